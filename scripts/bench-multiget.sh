@@ -0,0 +1,89 @@
+#!/bin/bash
+
+# Benchmark: batch multi-get vs N single gets
+# Fetches the same BATCH_SIZE items ROUNDS times, once with a GET /api/items/{id}
+# call per id and once with GET /api/items/batch, and compares items/sec.
+# Requires 'hey' (see README.md for installation)
+
+set -e
+
+# Configuration
+BATCH_SIZE=${BATCH_SIZE:-50}  # Items fetched per round
+ROUNDS=${ROUNDS:-200}         # Number of rounds
+WORKERS=${WORKERS:-10}        # Number of concurrent workers
+FIRST_ID=${FIRST_ID:-1}       # First item id to fetch (ids FIRST_ID..FIRST_ID+BATCH_SIZE-1)
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m' # No Color
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+if [ -z "$API_URL" ]; then
+    print_error "API_URL environment variable is required"
+    echo "Usage: API_URL=http://localhost:8000 ./bench-multiget.sh"
+    exit 1
+fi
+API_URL=${API_URL%/}
+
+if ! command -v hey &> /dev/null; then
+    print_error "'hey' is not installed (see scripts/README.md)"
+    exit 1
+fi
+
+# Comma-separated id list for the batch request
+IDS=$(seq -s, "$FIRST_ID" $((FIRST_ID + BATCH_SIZE - 1)))
+
+print_info "Benchmark Configuration:"
+echo "  API URL: $API_URL"
+echo "  Batch size: $BATCH_SIZE"
+echo "  Rounds: $ROUNDS"
+echo "  Workers: $WORKERS"
+echo ""
+
+# hey reports requests/sec on the "Requests/sec:" summary line
+requests_per_sec() {
+    grep "Requests/sec:" "$1" | awk '{print $2}'
+}
+
+# hey reports the run time on the "Total:" summary line
+total_secs() {
+    grep "Total:" "$1" | awk '{print $2}'
+}
+
+# hey takes a single URL, so fetch each id of the batch in turn; the rate is
+# all single gets over the summed run time
+print_info "Test 1/2: ${BATCH_SIZE} single gets x ${ROUNDS} rounds (GET /api/items/{id})"
+: > /tmp/bench-multiget-single.txt
+SINGLE_SECS=0
+for id in $(seq "$FIRST_ID" $((FIRST_ID + BATCH_SIZE - 1))); do
+    hey -n "$ROUNDS" -c "$WORKERS" "$API_URL/api/items/$id" > /tmp/bench-multiget-single-$id.txt
+    SINGLE_SECS=$(awk -v sum="$SINGLE_SECS" -v secs="$(total_secs /tmp/bench-multiget-single-$id.txt)" 'BEGIN { print sum + secs }')
+    cat /tmp/bench-multiget-single-$id.txt >> /tmp/bench-multiget-single.txt
+done
+SINGLE_RPS=$(awk -v secs="$SINGLE_SECS" -v n=$((BATCH_SIZE * ROUNDS)) 'BEGIN { printf "%.4f", n / secs }')
+echo "  $((BATCH_SIZE * ROUNDS)) requests over $BATCH_SIZE ids in ${SINGLE_SECS}s: $SINGLE_RPS requests/sec"
+
+print_info "Test 2/2: 1 batch get x ${ROUNDS} rounds (GET /api/items/batch)"
+hey -n "$ROUNDS" -c "$WORKERS" \
+    "$API_URL/api/items/batch?ids=$IDS" > /tmp/bench-multiget-batch.txt
+cat /tmp/bench-multiget-batch.txt
+
+BATCH_RPS=$(requests_per_sec /tmp/bench-multiget-batch.txt)
+
+echo ""
+print_info "Results (items/sec):"
+awk -v single="$SINGLE_RPS" -v batch="$BATCH_RPS" -v size="$BATCH_SIZE" 'BEGIN {
+    batch_items = batch * size
+    printf "  Single gets: %10.1f items/sec  (%.2f ms per %d items)\n", single, 1000 * size / single, size
+    printf "  Batch get:   %10.1f items/sec  (%.2f ms per %d items)\n", batch_items, 1000 / batch, size
+    printf "  Speedup:     %10.1fx\n", batch_items / single
+}'
+print_info "Raw results saved to /tmp/bench-multiget-*.txt"
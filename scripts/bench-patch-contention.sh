@@ -0,0 +1,144 @@
+#!/bin/bash
+
+# Benchmark: contended updates on hot items
+# Creates HOT_ITEMS items and has WORKERS clients per item decrement their
+# quantity concurrently, first with real read-modify-write pairs (GET, then a
+# full PUT with quantity - 1) and then with a single PATCH {"quantity_delta": -1}.
+# Reports updates/sec for both and how many decrements were lost.
+# Requires 'jq' and python3 (hey can't send dependent request pairs)
+
+set -e
+
+# Configuration
+HOT_ITEMS=${HOT_ITEMS:-1}     # Items updated concurrently
+REQUESTS=${REQUESTS:-2000}    # Updates per item and test
+WORKERS=${WORKERS:-20}        # Concurrent clients per item
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m' # No Color
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+if [ -z "$API_URL" ]; then
+    print_error "API_URL environment variable is required"
+    echo "Usage: API_URL=http://localhost:8000 ./bench-patch-contention.sh"
+    exit 1
+fi
+API_URL=${API_URL%/}
+
+for tool in jq python3; do
+    if ! command -v "$tool" &> /dev/null; then
+        print_error "'$tool' is not installed (see scripts/README.md)"
+        exit 1
+    fi
+done
+
+# Enough stock that no decrement is refused
+START_QUANTITY=$((REQUESTS * 2))
+ITEM_BODY="{\"name\":\"Hot item\",\"price\":1.00,\"quantity\":$START_QUANTITY}"
+
+print_info "Benchmark Configuration:"
+echo "  API URL: $API_URL"
+echo "  Hot items: $HOT_ITEMS"
+echo "  Updates per item: $REQUESTS"
+echo "  Clients per item: $WORKERS"
+echo ""
+
+ITEM_IDS=()
+for _ in $(seq "$HOT_ITEMS"); do
+    ITEM_IDS+=("$(curl -sf -X POST "$API_URL/api/items" -H "Content-Type: application/json" -d "$ITEM_BODY" | jq -r '.id')")
+done
+cleanup() {
+    for id in "${ITEM_IDS[@]}"; do
+        curl -sf -X DELETE "$API_URL/api/items/$id" > /dev/null || true
+    done
+}
+trap cleanup EXIT
+print_info "Created hot items: ${ITEM_IDS[*]}"
+
+# Resets the hot items, runs one mode and prints "<updates/sec> <successful updates> <lost decrements>"
+run_contended() {
+    for id in "${ITEM_IDS[@]}"; do
+        curl -sf -X PUT "$API_URL/api/items/$id" -H "Content-Type: application/json" -d "$ITEM_BODY" > /dev/null
+    done
+    python3 - "$1" "$API_URL" "$REQUESTS" "$WORKERS" "$START_QUANTITY" "${ITEM_IDS[@]}" <<'EOF'
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+mode, api_url, requests, workers, start_quantity = sys.argv[1], sys.argv[2], *map(int, sys.argv[3:6])
+item_ids = sys.argv[6:]
+
+def call(method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(api_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return json.loads(response.read())
+
+def update(item_id):
+    path = f"/api/items/{item_id}"
+    if mode == "rmw":
+        item = call("GET", path)
+        call("PUT", path, {field: item[field] for field in ("name", "description", "price")}
+             | {"quantity": item["quantity"] - 1})
+    else:
+        call("PATCH", path, {"quantity_delta": -1})
+
+succeeded = 0
+lock = threading.Lock()
+
+def client(item_id, count):
+    global succeeded
+    done = 0
+    for _ in range(count):
+        try:
+            update(item_id)
+            done += 1
+        except (urllib.error.URLError, OSError):
+            pass
+    with lock:
+        succeeded += done
+
+threads = [
+    threading.Thread(target=client, args=(item_id, requests // workers + (worker < requests % workers)))
+    for item_id in item_ids for worker in range(workers)
+]
+started = time.monotonic()
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+elapsed = time.monotonic() - started
+
+applied = sum(start_quantity - call("GET", f"/api/items/{item_id}")["quantity"] for item_id in item_ids)
+print(f"{succeeded / elapsed:.1f} {succeeded} {succeeded - applied}")
+EOF
+}
+
+print_info "Test 1/2: read-modify-write (GET, then PUT quantity - 1)"
+read -r RMW_RPS RMW_OK RMW_LOST <<< "$(run_contended rmw)"
+print_info "Test 2/2: PATCH {\"quantity_delta\": -1}"
+read -r PATCH_RPS PATCH_OK PATCH_LOST <<< "$(run_contended patch)"
+
+TOTAL=$((HOT_ITEMS * REQUESTS))
+echo ""
+print_info "Results (updates/sec across $HOT_ITEMS hot item(s)):"
+awk -v rmw="$RMW_RPS" -v patch="$PATCH_RPS" 'BEGIN {
+    printf "  GET + PUT:   %10.1f updates/sec  (2 round-trips, last writer wins)\n", rmw
+    printf "  PATCH delta: %10.1f updates/sec  (1 round-trip, atomic)\n", patch
+    printf "  Speedup:     %10.1fx\n", patch / rmw
+}'
+echo "  GET + PUT:   $RMW_OK/$TOTAL succeeded, $RMW_LOST decrements lost"
+echo "  PATCH delta: $PATCH_OK/$TOTAL succeeded, $PATCH_LOST decrements lost"
@@ -0,0 +1,123 @@
+#!/bin/bash
+
+# Benchmark: prepared vs plain-text hot item queries
+# Runs the same load twice against a running API, once with prepared statements
+# turned off (every query parsed and planned by PostgreSQL) and once with them on,
+# and compares requests/sec and the per-statement time from /admin/queries.
+# Requires 'hey' and 'jq' (see README.md for installation)
+
+set -e
+
+# Configuration
+REQUESTS=${REQUESTS:-5000}  # Requests per endpoint and mode
+WORKERS=${WORKERS:-20}      # Number of concurrent workers
+ITEM_ID=${ITEM_ID:-1}       # Existing item read and updated by the benchmark
+PAGE_SIZE=${PAGE_SIZE:-20}  # Items per list page
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+NC='\033[0m' # No Color
+
+print_info() {
+    echo -e "${GREEN}[INFO]${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}[ERROR]${NC} $1"
+}
+
+if [ -z "$API_URL" ]; then
+    print_error "API_URL environment variable is required"
+    echo "Usage: API_URL=http://localhost:8000 ./bench-prepared-statements.sh"
+    exit 1
+fi
+API_URL=${API_URL%/}
+
+for tool in hey jq; do
+    if ! command -v "$tool" &> /dev/null; then
+        print_error "'$tool' is not installed (see scripts/README.md)"
+        exit 1
+    fi
+done
+
+ITEM=$(curl -sf "$API_URL/api/items/$ITEM_ID") || {
+    print_error "Item $ITEM_ID not found - create one or set ITEM_ID"
+    exit 1
+}
+# Write the item back unchanged so the benchmark leaves no trace
+UPDATE_BODY=$(echo "$ITEM" | jq -c '{name, description, price, quantity}')
+
+print_info "Benchmark Configuration:"
+echo "  API URL: $API_URL"
+echo "  Requests per endpoint: $REQUESTS"
+echo "  Workers: $WORKERS"
+echo "  Item id: $ITEM_ID"
+echo ""
+
+# hey reports requests/sec on the "Requests/sec:" summary line
+requests_per_sec() {
+    grep "Requests/sec:" "$1" | awk '{print $2}'
+}
+
+run_mode() {
+    local mode=$1 enabled=$2
+    curl -sf -X POST "$API_URL/admin/db/prepared-statements?enabled=$enabled" > /dev/null
+    curl -sf -X POST "$API_URL/admin/queries/reset" > /dev/null
+
+    print_info "[$mode] GET /api/items/$ITEM_ID"
+    hey -n "$REQUESTS" -c "$WORKERS" "$API_URL/api/items/$ITEM_ID" > "/tmp/bench-prepared-$mode-get.txt"
+    print_info "[$mode] GET /api/items?limit=$PAGE_SIZE"
+    hey -n "$REQUESTS" -c "$WORKERS" "$API_URL/api/items?limit=$PAGE_SIZE" > "/tmp/bench-prepared-$mode-list.txt"
+    print_info "[$mode] PUT /api/items/$ITEM_ID"
+    hey -n "$REQUESTS" -c "$WORKERS" -m PUT -T "application/json" -d "$UPDATE_BODY" \
+        "$API_URL/api/items/$ITEM_ID" > "/tmp/bench-prepared-$mode-update.txt"
+
+    curl -sf "$API_URL/admin/queries?limit=100" > "/tmp/bench-prepared-$mode-queries.json"
+}
+
+# Mean statement time for one prepared statement, matched by its text or its EXECUTE form
+statement_mean_ms() {
+    local mode=$1 name=$2
+    local sql
+    sql=$(jq -r --arg name "$name" '.statements[$name]' /tmp/bench-prepared-statements.json)
+    jq -r --arg name "$name" --arg sql "$sql" '
+        [.statements[] | select(.query == $sql or (.query | startswith("EXECUTE " + $name + " ")))][0].mean_ms // "n/a"
+    ' "/tmp/bench-prepared-$mode-queries.json"
+}
+
+ORIGINAL=$(curl -sf "$API_URL/admin/db/prepared-statements" | tee /tmp/bench-prepared-statements.json | jq -r '.enabled')
+
+print_info "Test 1/2: plain-text queries"
+run_mode text false
+print_info "Test 2/2: prepared statements"
+run_mode prepared true
+
+curl -sf -X POST "$API_URL/admin/db/prepared-statements?enabled=$ORIGINAL" > /dev/null
+
+echo ""
+print_info "Results (requests/sec):"
+for endpoint in get list update; do
+    awk -v name="$endpoint" \
+        -v text="$(requests_per_sec "/tmp/bench-prepared-text-$endpoint.txt")" \
+        -v prepared="$(requests_per_sec "/tmp/bench-prepared-prepared-$endpoint.txt")" 'BEGIN {
+        printf "  %-7s text: %9.1f  prepared: %9.1f  (%+.1f%%)\n", name, text, prepared, 100 * (prepared - text) / text
+    }'
+done
+
+echo ""
+print_info "Statement time (mean ms per execution, from /admin/queries):"
+for pair in items_get:get items_list:list items_update:update; do
+    name=${pair%%:*}
+    endpoint=${pair##*:}
+    awk -v name="$name" \
+        -v text="$(statement_mean_ms text "$name")" \
+        -v prepared="$(statement_mean_ms prepared "$name")" \
+        -v rps="$(requests_per_sec "/tmp/bench-prepared-prepared-$endpoint.txt")" 'BEGIN {
+        if (text == "n/a" || prepared == "n/a") { printf "  %-13s no data\n", name; exit }
+        saved = text - prepared
+        printf "  %-13s text: %7.3f  prepared: %7.3f  saved: %6.3f ms/request (%.0f ms per second at %.0f req/s)\n",
+            name, text, prepared, saved, saved * rps, rps
+    }'
+done
+print_info "Raw results saved to /tmp/bench-prepared-*"
@@ -0,0 +1,272 @@
+"""
+Inventory Aggregates Module
+Maintains an incremental summary of the items table so aggregate reads are O(1)
+"""
+
+import os
+import sys
+import json
+import logging
+from decimal import Decimal
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Writers are spread over a handful of summary rows (keyed by id % shards) so
+# concurrent inserts don't all queue on a single hot row. Reads sum the shards.
+SUMMARY_SHARDS = 16
+
+# Quantity distribution buckets, indexed by items_quantity_bucket()
+QUANTITY_BUCKETS = [
+    "<=0",
+    "1-9",
+    "10-99",
+    "100-999",
+    "1000-9999",
+    "10000-99999",
+    "100000-999999",
+    ">=1000000",
+]
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS items_summary (
+        shard SMALLINT PRIMARY KEY,
+        item_count BIGINT NOT NULL DEFAULT 0,
+        total_quantity BIGINT NOT NULL DEFAULT 0,
+        total_value NUMERIC(20, 2) NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS items_quantity_histogram (
+        shard SMALLINT NOT NULL,
+        bucket SMALLINT NOT NULL,
+        item_count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (shard, bucket)
+    )
+    """,
+    """
+    CREATE OR REPLACE FUNCTION items_quantity_bucket(q INTEGER) RETURNS SMALLINT AS $$
+        SELECT (CASE WHEN q IS NULL OR q <= 0 THEN 0 ELSE LEAST(length(q::text), 7) END)::smallint
+    $$ LANGUAGE SQL IMMUTABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION items_summary_apply(
+        p_shard SMALLINT, p_count INTEGER, p_quantity BIGINT, p_value NUMERIC, p_bucket SMALLINT
+    ) RETURNS VOID AS $$
+    BEGIN
+        INSERT INTO items_summary AS s (shard, item_count, total_quantity, total_value)
+        VALUES (p_shard, p_count, p_quantity, p_value)
+        ON CONFLICT (shard) DO UPDATE
+        SET item_count = s.item_count + EXCLUDED.item_count,
+            total_quantity = s.total_quantity + EXCLUDED.total_quantity,
+            total_value = s.total_value + EXCLUDED.total_value;
+
+        INSERT INTO items_quantity_histogram AS h (shard, bucket, item_count)
+        VALUES (p_shard, p_bucket, p_count)
+        ON CONFLICT (shard, bucket) DO UPDATE
+        SET item_count = h.item_count + EXCLUDED.item_count;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION items_summary_maintain() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE'
+           AND NEW.price IS NOT DISTINCT FROM OLD.price
+           AND NEW.quantity IS NOT DISTINCT FROM OLD.quantity THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM items_summary_apply(
+                (OLD.id % {SUMMARY_SHARDS})::smallint, -1,
+                -COALESCE(OLD.quantity, 0)::bigint,
+                -(COALESCE(OLD.price, 0) * COALESCE(OLD.quantity, 0)),
+                items_quantity_bucket(OLD.quantity));
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM items_summary_apply(
+                (NEW.id % {SUMMARY_SHARDS})::smallint, 1,
+                COALESCE(NEW.quantity, 0)::bigint,
+                COALESCE(NEW.price, 0) * COALESCE(NEW.quantity, 0),
+                items_quantity_bucket(NEW.quantity));
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION items_summary_reset() RETURNS TRIGGER AS $$
+    BEGIN
+        DELETE FROM items_summary;
+        DELETE FROM items_quantity_histogram;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER items_summary_maintain
+        AFTER INSERT OR UPDATE OR DELETE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_summary_maintain()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER items_summary_reset
+        AFTER TRUNCATE ON items
+        FOR EACH STATEMENT EXECUTE FUNCTION items_summary_reset()
+    """,
+]
+
+def init_schema(cursor) -> None:
+    """Create the summary tables and triggers, seeding them from existing rows if needed"""
+    for statement in SCHEMA_SQL:
+        cursor.execute(statement)
+
+    # CREATE TRIGGER holds a lock that blocks writers until commit, so seeding
+    # here can't race with concurrent inserts.
+    cursor.execute("""
+        SELECT NOT EXISTS (SELECT 1 FROM items_summary)
+               AND EXISTS (SELECT 1 FROM items) AS needs_seed
+    """)
+    if cursor.fetchone()["needs_seed"]:
+        logger.info("Seeding inventory summary from existing items")
+        _write_summary(cursor, _compute_from_items(cursor))
+
+def fetch_aggregates(cursor) -> Dict[str, Any]:
+    """Read the maintained summary - cost is independent of the table size"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(item_count), 0) AS item_count,
+               COALESCE(SUM(total_quantity), 0) AS total_quantity,
+               COALESCE(SUM(total_value), 0) AS total_value
+        FROM items_summary
+    """)
+    totals = cursor.fetchone()
+    cursor.execute("""
+        SELECT bucket, SUM(item_count) AS item_count
+        FROM items_quantity_histogram
+        GROUP BY bucket
+    """)
+    histogram = {row["bucket"]: int(row["item_count"]) for row in cursor.fetchall()}
+    return format_aggregates(totals, histogram)
+
+def verify(cursor, repair: bool = False) -> Dict[str, Any]:
+    """Recompute the summary from scratch and report any drift, optionally repairing it"""
+    if repair:
+        # Block writers so the recomputed totals stay exact while we replace them
+        cursor.execute("LOCK TABLE items IN SHARE MODE")
+    else:
+        # Summary and items are written in the same transaction, so comparing
+        # them inside one snapshot is exact without blocking anyone
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    summary = fetch_aggregates(cursor)
+    actual = _compute_from_items(cursor)
+
+    differences = compare(summary, actual)
+    repaired = False
+    if differences and repair:
+        _write_summary(cursor, actual)
+        repaired = True
+        logger.warning(f"Inventory summary drift repaired: {differences}")
+    elif differences:
+        logger.warning(f"Inventory summary drift detected: {differences}")
+
+    return {
+        "drift": bool(differences),
+        "differences": differences,
+        "repaired": repaired,
+        "summary": summary,
+        "actual": actual,
+    }
+
+def compare(summary: Dict[str, Any], actual: Dict[str, Any]) -> Dict[str, Any]:
+    """Field-by-field differences between a maintained summary and recomputed totals"""
+    differences = {}
+    for field in ("item_count", "total_quantity", "total_value"):
+        if summary[field] != actual[field]:
+            differences[field] = {"summary": summary[field], "actual": actual[field]}
+    for label in QUANTITY_BUCKETS:
+        expected = actual["quantity_distribution"][label]
+        recorded = summary["quantity_distribution"][label]
+        if recorded != expected:
+            differences[f"quantity_distribution[{label}]"] = {"summary": recorded, "actual": expected}
+    return differences
+
+def _compute_from_items(cursor) -> Dict[str, Any]:
+    """Full scan of the items table - only used for seeding and verification"""
+    cursor.execute("""
+        SELECT COUNT(*) AS item_count,
+               COALESCE(SUM(quantity), 0) AS total_quantity,
+               COALESCE(SUM(COALESCE(price, 0) * COALESCE(quantity, 0)), 0) AS total_value
+        FROM items
+    """)
+    totals = cursor.fetchone()
+    cursor.execute("""
+        SELECT items_quantity_bucket(quantity) AS bucket, COUNT(*) AS item_count
+        FROM items
+        GROUP BY 1
+    """)
+    histogram = {row["bucket"]: int(row["item_count"]) for row in cursor.fetchall()}
+    return format_aggregates(totals, histogram)
+
+def _write_summary(cursor, aggregates: Dict[str, Any]) -> None:
+    """Replace the summary rows with the given totals, stored in shard 0"""
+    cursor.execute("DELETE FROM items_summary")
+    cursor.execute("DELETE FROM items_quantity_histogram")
+    cursor.execute(
+        """
+        INSERT INTO items_summary (shard, item_count, total_quantity, total_value)
+        VALUES (0, %s, %s, %s)
+        """,
+        (aggregates["item_count"], aggregates["total_quantity"], aggregates["total_value"])
+    )
+    for bucket, label in enumerate(QUANTITY_BUCKETS):
+        count = aggregates["quantity_distribution"][label]
+        if count:
+            cursor.execute(
+                "INSERT INTO items_quantity_histogram (shard, bucket, item_count) VALUES (0, %s, %s)",
+                (bucket, count)
+            )
+
+def quantity_bucket(quantity) -> int:
+    """Python twin of items_quantity_bucket(): 0 for <=0, otherwise the digit count capped at 7"""
+    if quantity is None or quantity <= 0:
+        return 0
+    return min(len(str(quantity)), len(QUANTITY_BUCKETS) - 1)
+
+def format_aggregates(totals, histogram: Dict[int, int]) -> Dict[str, Any]:
+    """Shape totals and a bucket histogram into the aggregates response"""
+    return {
+        "item_count": int(totals["item_count"]),
+        "total_quantity": int(totals["total_quantity"]),
+        "total_value": Decimal(totals["total_value"]).quantize(Decimal("0.01")),
+        "quantity_distribution": {
+            label: histogram.get(bucket, 0) for bucket, label in enumerate(QUANTITY_BUCKETS)
+        },
+    }
+
+# Command line entry point: python aggregates.py verify|rebuild
+if __name__ == "__main__":
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command not in ("verify", "rebuild"):
+        print("Usage: python aggregates.py [verify|rebuild]", file=sys.stderr)
+        sys.exit(2)
+
+    database_url = os.getenv("DATABASE_URL", "")
+    if not database_url:
+        print("DATABASE_URL environment variable is required", file=sys.stderr)
+        sys.exit(2)
+
+    conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+    try:
+        cursor = conn.cursor()
+        report = verify(cursor, repair=(command == "rebuild"))
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    print(json.dumps(report, indent=2, default=str))
+    sys.exit(1 if report["drift"] and not report["repaired"] else 0)
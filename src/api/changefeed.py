@@ -0,0 +1,291 @@
+"""
+Change Feed Module
+Publishes item changes through PostgreSQL LISTEN/NOTIFY and streams them to clients as Server-Sent Events
+"""
+
+import os
+import json
+import select
+import asyncio
+import logging
+import threading
+import itertools
+from collections import deque
+from typing import Optional, List, Tuple
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+CHANGE_FEED_CHANNEL = "items_changes"
+CHANGE_FEED_BUFFER_SIZE = int(os.getenv("CHANGE_FEED_BUFFER_SIZE", "1000"))  # Events kept for Last-Event-ID resume
+CHANGE_FEED_SUBSCRIBER_QUEUE = int(os.getenv("CHANGE_FEED_SUBSCRIBER_QUEUE", "256"))  # Per-subscriber backlog before disconnect
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+
+# The trigger publishes every write, including the API's own handlers (NOTIFY is
+# delivered when the writing transaction commits) and out-of-band SQL.
+SCHEMA_SQL = [
+    "CREATE SEQUENCE IF NOT EXISTS items_change_seq",
+    f"""
+    CREATE OR REPLACE FUNCTION items_notify_change() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM pg_notify('{CHANGE_FEED_CHANNEL}', json_build_object(
+                'seq', nextval('items_change_seq'), 'op', 'delete', 'id', OLD.id)::text);
+        ELSE
+            PERFORM pg_notify('{CHANGE_FEED_CHANNEL}', json_build_object(
+                'seq', nextval('items_change_seq'), 'op', lower(TG_OP), 'id', NEW.id,
+                'updated_at', NEW.updated_at)::text);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER items_notify_change
+        AFTER INSERT OR UPDATE OR DELETE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_notify_change()
+    """,
+]
+
+# Queue sentinels
+_OVERFLOW = object()
+_RESET = object()
+_CLOSED = object()
+
+def init_schema(cursor) -> None:
+    """Create the change sequence and notification trigger"""
+    for statement in SCHEMA_SQL:
+        cursor.execute(statement)
+
+class _Subscriber:
+    __slots__ = ("queue",)
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CHANGE_FEED_SUBSCRIBER_QUEUE)
+
+class ChangeFeed:
+    """
+    One LISTEN connection per worker process, fanned out to any number of SSE
+    subscribers. Events are kept in a ring buffer so clients can resume with
+    Last-Event-ID.
+
+    PostgreSQL delivers notifications to every listener in commit order, so
+    each worker's ring holds the same sequence and a client may resume
+    against any replica as long as its last event is still buffered.
+
+    All buffer and subscriber bookkeeping happens on the event loop thread;
+    the listener thread only hands batches over with call_soon_threadsafe.
+    """
+
+    def __init__(self, buffer_size: int = CHANGE_FEED_BUFFER_SIZE):
+        self._buffer: deque = deque(maxlen=buffer_size)  # (event_id, data)
+        self._subscribers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._local_seq = itertools.count(1)
+        self.stats = {"events": 0, "overflows": 0, "resets": 0, "listener_connected": False}
+
+    # Producers
+
+    def start(self, loop: asyncio.AbstractEventLoop, database_url: str) -> None:
+        """Start the LISTEN thread for this worker"""
+        self._loop = loop
+        if database_url and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, args=(database_url,), daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the listener and end every open stream"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.close_subscribers()
+
+    def publish(self, event: dict) -> None:
+        """Publish an event from any thread (used by writers that bypass PostgreSQL)"""
+        if self._loop is None:
+            return
+        event = {"seq": next(self._local_seq), **event}
+        self._loop.call_soon_threadsafe(self._dispatch, [(str(event["seq"]), json.dumps(event, default=str))])
+
+    def close_subscribers(self) -> None:
+        """End every open stream; clients reconnect with Last-Event-ID"""
+        for subscriber in list(self._subscribers):
+            self._signal(subscriber, _CLOSED)
+        self._subscribers.clear()
+
+    def _listen(self, database_url: str) -> None:
+        backoff = 1.0
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(database_url)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANGE_FEED_CHANNEL}")
+                cursor.close()
+                self.stats["listener_connected"] = True
+                backoff = 1.0
+                if connected_before:
+                    # Anything committed while we were disconnected is lost to this worker
+                    self._loop.call_soon_threadsafe(self._reset)
+                connected_before = True
+                logger.info("Change feed listener connected")
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    batch: List[Tuple[str, str]] = []
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        try:
+                            event_id = str(json.loads(payload)["seq"])
+                        except (ValueError, KeyError):
+                            continue
+                        batch.append((event_id, payload))
+                    if batch:
+                        self._loop.call_soon_threadsafe(self._dispatch, batch)
+            except Exception as e:
+                self.stats["listener_connected"] = False
+                logger.error(f"Change feed listener error: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+        self.stats["listener_connected"] = False
+
+    # Event loop side
+
+    def _dispatch(self, batch: List[Tuple[str, str]]) -> None:
+        self._buffer.extend(batch)
+        self.stats["events"] += len(batch)
+        for subscriber in list(self._subscribers):
+            for event in batch:
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Slow consumer: drop it rather than buffer without bound.
+                    # The client resumes from the ring buffer with Last-Event-ID.
+                    self.stats["overflows"] += 1
+                    self._subscribers.discard(subscriber)
+                    self._signal(subscriber, _OVERFLOW)
+                    break
+
+    def _reset(self) -> None:
+        self.stats["resets"] += 1
+        self._buffer.clear()
+        for subscriber in list(self._subscribers):
+            self._signal(subscriber, _RESET)
+        self._subscribers.clear()
+
+    @staticmethod
+    def _signal(subscriber: _Subscriber, sentinel: object) -> None:
+        # Discard whatever is queued so the sentinel always fits
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(sentinel)
+
+    def _subscribe(self, last_event_id: Optional[str]):
+        """Register a subscriber and return its replay backlog (None means the client must resync)"""
+        backlog: Optional[List[Tuple[str, str]]] = []
+        if last_event_id:
+            backlog = None
+            for index, (event_id, _) in enumerate(self._buffer):
+                if event_id == last_event_id:
+                    backlog = list(self._buffer)[index + 1:]
+                    break
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber, backlog
+
+    async def stream(self, last_event_id: Optional[str]):
+        """Async generator of SSE frames for one subscriber"""
+        subscriber, backlog = self._subscribe(last_event_id)
+        try:
+            yield "retry: 2000\n\n"
+            if backlog is None:
+                # Last-Event-ID fell out of the ring buffer: tell the client to re-list
+                yield "event: reset\ndata: {}\n\n"
+                backlog = []
+            if backlog:
+                yield "".join(_format(event) for event in backlog)
+
+            queue = subscriber.queue
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), CHANGE_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                # Coalesce whatever else is already queued into a single write
+                frames = []
+                while True:
+                    if item is _OVERFLOW:
+                        frames.append("event: overflow\ndata: {}\n\n")
+                        break
+                    if item is _RESET:
+                        frames.append("event: reset\ndata: {}\n\n")
+                        break
+                    if item is _CLOSED:
+                        break
+                    frames.append(_format(item))
+                    if queue.empty() or len(frames) >= 64:
+                        item = None
+                        break
+                    item = queue.get_nowait()
+                if frames:
+                    yield "".join(frames)
+                if item is not None:
+                    return
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def status(self) -> dict:
+        return {
+            **self.stats,
+            "subscribers": len(self._subscribers),
+            "buffered_events": len(self._buffer),
+            "buffer_size": self._buffer.maxlen,
+            "oldest_event_id": self._buffer[0][0] if self._buffer else None,
+            "newest_event_id": self._buffer[-1][0] if self._buffer else None,
+        }
+
+def _format(event: Tuple[str, str]) -> str:
+    event_id, data = event
+    return f"id: {event_id}\ndata: {data}\n\n"
+
+# Per-worker change feed
+change_feed = ChangeFeed()
+
+# Create API router
+router = APIRouter()
+
+@router.get("/api/items/changes", tags=["Items"])
+async def stream_item_changes(request: Request):
+    """Stream item changes as Server-Sent Events (resume with the Last-Event-ID header)"""
+    last_event_id = request.headers.get("last-event-id") or request.query_params.get("last_event_id")
+    return StreamingResponse(
+        change_feed.stream(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/admin/changefeed/status", tags=["Admin"])
+async def get_change_feed_status():
+    """Get change feed listener, buffer and subscriber statistics"""
+    return change_feed.status()
@@ -8,119 +8,388 @@ import logging
 import time
 import random
 import threading
+import multiprocessing
+import math
+import mmap
 import gc
-from typing import Dict, Any, Optional
+import json
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, List
 
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
 # Chaos Engineering State
 chaos_state = {
-    "memory_leak": {"enabled": False, "intensity": 5, "leak_data": [], "thread": None},  # intensity = minutes to 95% RAM
-    "cpu_spike": {"enabled": False, "intensity": 50, "thread": None},
+    "memory_leak": {"enabled": False, "intensity": 5, "leak_data": [], "thread": None, "profile": "linear", "stats": None, "run_id": 0},  # intensity = minutes to 95% RAM
+    "cpu_spike": {"enabled": False, "intensity": 50, "thread": None, "cores": None, "stats": None, "run_id": 0},  # intensity = % of container CPU
     "random_errors": {"enabled": False, "intensity": 30},  # 30% error rate
     "slow_responses": {"enabled": False, "intensity": 3.0},  # 3 second delay
     "connection_leak": {"enabled": False, "intensity": 50, "leaked_connections": []},
     "corrupt_data": {"enabled": False, "intensity": 20},  # 20% corruption rate
     "crash_app": {"enabled": False, "intensity": 5},  # intensity = seconds delay before crash
+    # Database-layer faults (applied in dbfaults.py and db.py); routes are path
+    # prefixes and query_types statement kinds - empty lists match everything
+    "db_latency": {"enabled": False, "intensity": 50, "distribution": "lognormal", "sigma": 1.0, "tail_percent": 5, "tail_ms": 2000, "routes": [], "query_types": []},  # intensity = median added ms per query
+    "db_pool_exhaustion": {"enabled": False, "intensity": 100, "thread": None, "stats": None, "run_id": 0},  # intensity = % of pool slots held
+    "db_connection_drop": {"enabled": False, "intensity": 5, "routes": [], "query_types": []},  # intensity = % of queries whose connection is killed
+    "db_slow_connect": {"enabled": False, "intensity": 2000, "reconnect_percent": 10, "routes": []},  # intensity = ms added to each new connection
 }
 
 class ChaosConfig(BaseModel):
     enabled: bool
     intensity: Optional[int] = None
+    cores: Optional[int] = None  # cpu_spike only: number of burner processes
+    profile: Optional[str] = None  # memory_leak only: linear, step, sawtooth or hold_then_release
+    distribution: Optional[str] = None  # db_latency only: lognormal or bimodal
+    sigma: Optional[float] = None  # db_latency lognormal: shape (higher = heavier tail)
+    tail_percent: Optional[float] = None  # db_latency bimodal: % of queries in the slow mode
+    tail_ms: Optional[int] = None  # db_latency bimodal: latency of the slow mode
+    reconnect_percent: Optional[float] = None  # db_slow_connect: % of checkouts forced onto a new connection
+    routes: Optional[List[str]] = None  # db faults: path prefixes the fault applies to
+    query_types: Optional[List[str]] = None  # db_latency/db_connection_drop: select, insert, update, delete, other
+
+# Configuration
+CHAOS_CPU_CORES = int(os.getenv("CHAOS_CPU_CORES", "0"))  # Burner processes for cpu_spike (0 = one per available core)
+CPU_CONTROL_INTERVAL = 0.5  # Seconds between utilization measurements
+CPU_BURN_PERIOD = 0.05  # Duty-cycle period of each burner process
+
+class RequestStats:
+    """Per-second request counts and latency samples for the last few minutes"""
+
+    MAX_SAMPLES_PER_SECOND = 1000
+
+    def __init__(self, window_seconds: int = 300):
+        self._lock = threading.Lock()
+        self._window = window_seconds
+        self._buckets = deque()  # [second, count, latencies_ms]
+
+    def record(self, duration_ms: Optional[float] = None):
+        now = int(time.time())
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != now:
+                self._buckets.append([now, 0, []])
+                while self._buckets and self._buckets[0][0] <= now - self._window:
+                    self._buckets.popleft()
+            bucket = self._buckets[-1]
+            bucket[1] += 1
+            if duration_ms is not None and len(bucket[2]) < self.MAX_SAMPLES_PER_SECOND:
+                bucket[2].append(duration_ms)
+
+    def rate(self, seconds: int) -> float:
+        """Requests per second over the last `seconds` complete seconds"""
+        end = int(time.time())  # the current second is still filling up
+        start = end - seconds
+        with self._lock:
+            total = sum(count for second, count, _ in self._buckets if start <= second < end)
+        return total / seconds if seconds > 0 else 0.0
+
+    def percentile(self, percent: float, seconds: int) -> Optional[float]:
+        """Latency percentile (ms) over the last `seconds` seconds, or None without samples"""
+        start = int(time.time()) - seconds
+        with self._lock:
+            samples = [value for second, _, values in self._buckets if second >= start for value in values]
+        if not samples:
+            return None
+        samples.sort()
+        return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+request_stats = RequestStats()
+
+def record_request(duration_ms: Optional[float] = None):
+    """Count a business API request and its latency - call this from middleware"""
+    request_stats.record(duration_ms)
+
+class CpuUtilizationSampler:
+    """
+    Measures CPU utilization as a percentage of the CPU available to this
+    container: cgroup v2 usage against the cpu.max quota when present, or
+    host-wide utilization otherwise.
+    """
+
+    def __init__(self):
+        if self._read_cgroup_usage() is not None:
+            self.source = "cgroup"
+            self.capacity = self._read_capacity()
+        else:
+            # psutil.cpu_times() sums over every CPU on the host
+            self.source = "host"
+            self.capacity = float(os.cpu_count() or 1)
+        self._last = self._snapshot()
+
+    @staticmethod
+    def _read_capacity() -> float:
+        try:
+            with open('/sys/fs/cgroup/cpu.max', 'r') as f:
+                quota, period = f.read().split()
+                if quota != "max":
+                    return int(quota) / int(period)
+        except (FileNotFoundError, ValueError):
+            pass
+        return float(os.cpu_count() or 1)
+
+    @staticmethod
+    def _read_cgroup_usage() -> Optional[float]:
+        try:
+            with open('/sys/fs/cgroup/cpu.stat', 'r') as f:
+                for line in f:
+                    if line.startswith("usage_usec"):
+                        return int(line.split()[1]) / 1e6
+        except (FileNotFoundError, ValueError):
+            pass
+        return None
+
+    def _snapshot(self):
+        if self.source == "cgroup":
+            return time.monotonic(), self._read_cgroup_usage()
+        import psutil
+        times = psutil.cpu_times()
+        return time.monotonic(), sum(times) - times.idle - getattr(times, "iowait", 0)
+
+    def sample(self) -> float:
+        """Utilization (0-100) since the previous call"""
+        now, busy = self._snapshot()
+        last_time, last_busy = self._last
+        self._last = (now, busy)
+        elapsed = now - last_time
+        if elapsed <= 0:
+            return 0.0
+        return max(0.0, min(100.0, (busy - last_busy) / (elapsed * self.capacity) * 100))
+
+def _cpu_burner(duty, stop):
+    """Burner process: spin for duty * period, sleep for the rest, until stopped"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        busy_until = start + CPU_BURN_PERIOD * duty.value
+        while time.perf_counter() < busy_until:
+            pass
+        remaining = CPU_BURN_PERIOD - (time.perf_counter() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+
+# Burners are forked from a single-threaded fork server, not from the API:
+# a fork of the API would inherit its locks, pool sockets and memory_leak's
+# shared mappings (keeping that memory alive until the burners exit).
+# Preloading just this module keeps the server from importing main.py.
+_burner_context = multiprocessing.get_context("forkserver")
+_burner_context.set_forkserver_preload(["chaos"])
+
+def _start_burners(cores: int):
+    # Burners are separate processes, so they load real cores without ever
+    # taking the API process's GIL
+    context = _burner_context
+    duty = context.Value('d', 0.0, lock=False)
+    stop = context.Event()
+    processes = []
+    for _ in range(cores):
+        process = context.Process(target=_cpu_burner, args=(duty, stop), daemon=True)
+        process.start()
+        processes.append(process)
+    return duty, stop, processes
+
+def _stop_burners(stop, processes):
+    stop.set()
+    for process in processes:
+        process.join(timeout=CPU_BURN_PERIOD * 4)
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout=1)
 
 # Background thread functions
 def cpu_burn_thread():
-    """Background thread that burns CPU cycles"""
+    """Background thread that holds CPU utilization at the target using burner processes"""
     logger.info("Worker thread initialized for async task processing")
-    while chaos_state["cpu_spike"]["enabled"]:
-        # Burn CPU based on intensity (0-100)
-        intensity = chaos_state["cpu_spike"]["intensity"]
-        burn_duration = intensity / 1000.0  # Max 100ms of burning
-        sleep_duration = (100 - intensity) / 1000.0  # Rest of the time sleeping
-        
-        start = time.time()
-        while time.time() - start < burn_duration:
-            _ = sum(i * i for i in range(1000))  # Busy work
-        
-        if sleep_duration > 0:
-            time.sleep(sleep_duration)
+    state = chaos_state["cpu_spike"]
+    run_id = state["run_id"]
+    sampler = CpuUtilizationSampler()
+    baseline_rps = request_stats.rate(10)
+    cores = None
+    duty = stop = None
+    processes = []
+    achieved = None
+    try:
+        # A newer thread (disable + re-enable) takes over by bumping run_id
+        while state["enabled"] and state["run_id"] == run_id:
+            requested_cores = state.get("cores") or CHAOS_CPU_CORES or max(1, math.ceil(sampler.capacity))
+            if requested_cores != cores:
+                if processes:
+                    _stop_burners(stop, processes)
+                cores = requested_cores
+                duty, stop, processes = _start_burners(cores)
+                # Feed-forward: the duty cycle that would hit the target on an idle host
+                duty.value = min(1.0, state["intensity"] / 100 * sampler.capacity / cores)
+                sampler.sample()
+
+            time.sleep(CPU_CONTROL_INTERVAL)
+            measured = sampler.sample()
+            achieved = measured if achieved is None else 0.7 * achieved + 0.3 * measured
+
+            # Integral control on the measured utilization, so the burners back off
+            # when the API itself is busy and push harder when it is idle
+            error = state["intensity"] - measured
+            duty.value = max(0.0, min(1.0, duty.value + 0.5 * error / 100 * sampler.capacity / cores))
+
+            current_rps = request_stats.rate(5)
+            state["stats"] = {
+                "target_percent": state["intensity"],
+                "achieved_percent": round(achieved, 1),
+                "duty_cycle_percent": round(duty.value * 100, 1),
+                "burner_processes": cores,
+                "cpu_capacity": round(sampler.capacity, 2),
+                "measurement": sampler.source,
+                "baseline_rps": round(baseline_rps, 1),
+                "current_rps": round(current_rps, 1),
+                "throughput_change_percent": (
+                    round((current_rps - baseline_rps) / baseline_rps * 100, 1) if baseline_rps else None
+                ),
+            }
+    finally:
+        if processes:
+            _stop_burners(stop, processes)
     logger.info("Worker thread terminated")
 
+# Memory pressure profiles (intensity = ramp duration in minutes)
+MEMORY_PROFILES = ("linear", "step", "sawtooth", "hold_then_release")
+MEMORY_CHUNK_BYTES = 16 * 1024 * 1024  # Size of each anonymous mapping
+MEMORY_TICK_SECONDS = 0.25  # How often the allocation is adjusted towards the profile
+MEMORY_MAX_CHUNKS_PER_TICK = 16  # Caps the fault-in rate at 256 MB per tick
+MEMORY_STEPS = 5  # Number of plateaus in the "step" profile
+_PAGE_SIZE = mmap.PAGESIZE
+_memory_lock = threading.Lock()
+
+def _memory_limit() -> int:
+    """Container memory limit from cgroup v2, or total host memory"""
+    import psutil
+    # Try to read container memory limit from cgroup
+    try:
+        with open('/sys/fs/cgroup/memory.max', 'r') as f:
+            container_memory_limit = int(f.read().strip())
+            if container_memory_limit == -1 or container_memory_limit > 1e15:  # "max" or unreasonably large
+                raise ValueError("No limit set")
+    except (FileNotFoundError, ValueError):
+        # Fallback to system total memory if cgroup file doesn't exist
+        container_memory_limit = psutil.virtual_memory().total
+    return container_memory_limit
+
+def _profile_fraction(profile: str, elapsed: float, ramp_seconds: float) -> float:
+    """Fraction (0-1) of the peak allocation the profile calls for at `elapsed` seconds"""
+    progress = elapsed / ramp_seconds if ramp_seconds > 0 else 1.0
+    if profile == "step":
+        return min(1.0, (math.floor(progress * MEMORY_STEPS) + 1) / MEMORY_STEPS)
+    if profile == "sawtooth":
+        return progress % 1.0
+    if profile == "hold_then_release":
+        # Ramp up, hold at the peak for as long again, then let go
+        if progress < 1.0:
+            return progress
+        return 1.0 if progress < 2.0 else 0.0
+    return min(1.0, progress)  # linear
+
+def _allocated_bytes() -> int:
+    return sum(len(region) for region in chaos_state["memory_leak"]["leak_data"])
+
+def _allocate_region() -> mmap.mmap:
+    region = mmap.mmap(-1, MEMORY_CHUNK_BYTES)
+    # Fault every page in with one strided write done in C, instead of a
+    # Python loop per page
+    region[::_PAGE_SIZE] = b"\x01" * len(range(0, MEMORY_CHUNK_BYTES, _PAGE_SIZE))
+    return region
+
+def release_leaked_memory():
+    """Unmap every region immediately - the memory goes straight back to the OS"""
+    with _memory_lock:
+        regions = chaos_state["memory_leak"]["leak_data"]
+        for region in regions:
+            region.close()
+        regions.clear()
+
 def memory_leak_thread():
-    """Background thread that gradually leaks memory over time"""
+    """Background thread that moves memory usage along the configured profile"""
     try:
         import psutil
-        import os
-        
+
         logger.info("Initializing request cache manager")
-        
-        # Get target duration in seconds
-        target_minutes = chaos_state["memory_leak"]["intensity"]
-        target_seconds = target_minutes * 60
-        
-        # Try to read container memory limit from cgroup
-        try:
-            with open('/sys/fs/cgroup/memory.max', 'r') as f:
-                container_memory_limit = int(f.read().strip())
-                if container_memory_limit == -1 or container_memory_limit > 1e15:  # "max" or unreasonably large
-                    raise ValueError("No limit set")
-        except (FileNotFoundError, ValueError):
-            # Fallback to system total memory if cgroup file doesn't exist
-            container_memory_limit = psutil.virtual_memory().total
-        
+        state = chaos_state["memory_leak"]
+        run_id = state["run_id"]
+        profile = state["profile"]
+
+        container_memory_limit = _memory_limit()
         logger.debug(f"Container memory limit detected: {container_memory_limit / (1024**3):.2f} GB")
-        
-        # Target: 95% of container memory
-        target_memory_bytes = int(container_memory_limit * 0.95)
-        
-        # Calculate allocation size and interval
-        allocation_size_mb = 50  # Allocate 50MB at a time
-        allocation_size_bytes = allocation_size_mb * 1024 * 1024
-        
-        # Calculate number of allocations needed
-        total_allocations_needed = target_memory_bytes // allocation_size_bytes
-        
-        # Calculate sleep interval between allocations
-        sleep_interval = target_seconds / total_allocations_needed if total_allocations_needed > 0 else 1
-        
-        logger.debug(f"Cache target size: {target_memory_bytes / (1024**3):.2f} GB")
-        
+
+        # Target: 95% of container memory, counting what the process already uses
         process = psutil.Process(os.getpid())
-        start_time = time.time()
-        
-        while chaos_state["memory_leak"]["enabled"]:
-            current_memory = process.memory_info().rss
-            
-            if current_memory >= target_memory_bytes:
-                # Hold at 95% until disabled
-                logger.debug(f"Cache size stable at {current_memory / (1024**3):.2f} GB")
-                time.sleep(10)  # Check every 10 seconds
-                continue
-            
-            # Allocate memory chunk
-            chunk = bytearray(allocation_size_bytes)
-            # Write to the memory to ensure it's actually allocated
-            for i in range(0, allocation_size_bytes, 4096):
-                chunk[i] = random.randint(0, 255)
-            chaos_state["memory_leak"]["leak_data"].append(chunk)
-            
-            elapsed = time.time() - start_time
-            current_memory = process.memory_info().rss
-            progress = (current_memory / target_memory_bytes) * 100
-            
-            logger.debug(f"Cache size: {current_memory / (1024**3):.2f} GB ({progress:.1f}% capacity)")
-            
-            # Sleep before next allocation
-            if chaos_state["memory_leak"]["enabled"]:
-                time.sleep(sleep_interval)
-        
+        baseline_rss = process.memory_info().rss - _allocated_bytes()
+        peak_bytes = max(0, int(container_memory_limit * 0.95) - baseline_rss)
+        logger.debug(f"Cache target size: {peak_bytes / (1024**3):.2f} GB")
+
+        start_time = time.monotonic()
+        while state["enabled"] and state["run_id"] == run_id:
+            ramp_seconds = state["intensity"] * 60
+            fraction = _profile_fraction(profile, time.monotonic() - start_time, ramp_seconds)
+            target_bytes = int(peak_bytes * fraction)
+
+            # Move towards the target, at most MEMORY_MAX_CHUNKS_PER_TICK at a
+            # time so disable never waits on a long allocation burst
+            with _memory_lock:
+                regions = state["leak_data"]
+                allocated = _allocated_bytes()
+                budget = MEMORY_MAX_CHUNKS_PER_TICK
+                while state["enabled"] and budget > 0 and allocated + MEMORY_CHUNK_BYTES <= target_bytes:
+                    regions.append(_allocate_region())
+                    allocated += MEMORY_CHUNK_BYTES
+                    budget -= 1
+                while regions and allocated > target_bytes:
+                    regions.pop().close()
+                    allocated -= MEMORY_CHUNK_BYTES
+
+                # Disable releases the memory under this lock; don't report it
+                # as still allocated afterwards
+                if not state["enabled"] or state["run_id"] != run_id:
+                    break
+                rss = process.memory_info().rss
+                state["stats"] = {
+                    "profile": profile,
+                    "allocated_bytes": allocated,
+                    "target_bytes": target_bytes,
+                    "peak_target_bytes": peak_bytes,
+                    "limit_bytes": container_memory_limit,
+                    "allocated_percent_of_target": round(allocated / target_bytes * 100, 1) if target_bytes else None,
+                    "rss_bytes": rss,
+                    "rss_percent_of_limit": round(rss / container_memory_limit * 100, 1),
+                }
+            logger.debug(f"Cache size: {allocated / (1024**3):.2f} GB ({rss / container_memory_limit * 100:.1f}% capacity)")
+            time.sleep(MEMORY_TICK_SECONDS)
+
     except Exception as e:
         logger.error(f"Cache manager error: {str(e)}")
 
+def _configure_db_fault(fault_type: str, config: ChaosConfig) -> None:
+    """Validate and store the distribution and scope settings of a database fault"""
+    from dbfaults import LATENCY_DISTRIBUTIONS, QUERY_TYPES
+    state = chaos_state[fault_type]
+    if config.distribution is not None and config.distribution not in LATENCY_DISTRIBUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown latency distribution '{config.distribution}' (expected one of {', '.join(LATENCY_DISTRIBUTIONS)})")
+    if config.query_types is not None:
+        unknown = [name for name in config.query_types if name not in QUERY_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown query types {unknown} (expected any of {', '.join(QUERY_TYPES)})")
+    settings = {
+        "distribution": config.distribution,
+        "sigma": config.sigma,
+        "tail_percent": config.tail_percent,
+        "tail_ms": config.tail_ms,
+        "reconnect_percent": config.reconnect_percent,
+        "routes": config.routes,
+        "query_types": config.query_types,
+    }
+    for key, value in settings.items():
+        if value is not None and key in state:
+            state[key] = value
+
 # Middleware helper function
 def apply_chaos_middleware():
     """Apply chaos faults - call this from middleware"""
@@ -146,6 +415,122 @@ def apply_chaos_middleware():
         # Silently inject delay - no obvious logging
         time.sleep(delay)
 
+# Live dashboard stream
+CHAOS_STREAM_INTERVAL = 1.0  # Seconds between metric pushes
+
+def chaos_status() -> Dict[str, Any]:
+    """Serializable status of all chaos faults (without thread objects)"""
+    status = {}
+    for fault_type, state in chaos_state.items():
+        status[fault_type] = {
+            "enabled": state["enabled"],
+            "intensity": state["intensity"]
+        }
+        if state.get("stats"):
+            status[fault_type]["stats"] = state["stats"]
+        if state.get("routes") or state.get("query_types"):
+            status[fault_type]["scope"] = {"routes": state.get("routes", []), "query_types": state.get("query_types", [])}
+    return status
+
+class ChaosStream:
+    """
+    Pushes chaos state and live metrics to every open dashboard over SSE.
+    A single producer task samples once per interval (or immediately when a
+    fault is toggled) and fans out only what changed, however many tabs are
+    open. The producer runs only while someone is subscribed.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._producer: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._faults: Dict[str, Any] = {}
+        self._metrics: Dict[str, Any] = {}
+        self._sampler = None
+        self._process = None
+
+    def notify(self):
+        """Push fault state now instead of at the next interval (safe to call from any thread)"""
+        if self._wake is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def close(self):
+        """End every open stream and stop the producer"""
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+        self._subscribers.clear()
+        if self._producer is not None:
+            self._producer.cancel()
+            self._producer = None
+
+    def _sample_metrics(self) -> Dict[str, Any]:
+        import psutil
+        if self._process is None:
+            self._process = psutil.Process(os.getpid())
+            self._sampler = CpuUtilizationSampler()
+        p99 = request_stats.percentile(99, 10)
+        return {
+            "rps": round(request_stats.rate(5), 1),
+            "p99_ms": round(p99, 1) if p99 is not None else None,
+            "rss_bytes": self._process.memory_info().rss,
+            "cpu_percent": round(self._sampler.sample(), 1),
+            "leaked_connections": len(chaos_state["connection_leak"]["leaked_connections"]),
+        }
+
+    def _send(self, queue: asyncio.Queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A tab that can't keep up gets a fresh full snapshot instead of a backlog
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(("snapshot", {"faults": self._faults, "metrics": self._metrics}))
+
+    async def _produce(self):
+        while self._subscribers:
+            faults = chaos_status()
+            changed = {name: state for name, state in faults.items() if self._faults.get(name) != state}
+            self._faults = faults
+            self._metrics = self._sample_metrics()
+            for queue in list(self._subscribers):
+                if changed:
+                    self._send(queue, ("faults", changed))
+                self._send(queue, ("metrics", self._metrics))
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), CHAOS_STREAM_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        self._producer = None
+
+    async def stream(self):
+        """Async generator of SSE frames for one dashboard"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        if self._wake is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+        self._subscribers.add(queue)
+        if self._producer is None:
+            self._faults = chaos_status()
+            self._metrics = self._sample_metrics()
+            self._producer = asyncio.create_task(self._produce())
+        queue.put_nowait(("snapshot", {"faults": self._faults, "metrics": self._metrics}))
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                message = await queue.get()
+                if message is None:
+                    return
+                event, data = message
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            self._subscribers.discard(queue)
+
+chaos_stream = ChaosStream()
+
 # Create API router
 router = APIRouter(prefix="/admin/chaos", tags=["Chaos Engineering"])
 
@@ -394,6 +779,44 @@ async def chaos_dashboard():
                 transform: scale(1.05);
             }
             
+            .metrics-bar {
+                display: grid;
+                grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
+                gap: 15px;
+                margin-bottom: 20px;
+            }
+            
+            .metric {
+                background: rgba(255,255,255,0.9);
+                border-radius: 12px;
+                padding: 12px 16px;
+                display: flex;
+                flex-direction: column;
+                box-shadow: 0 8px 32px rgba(0,0,0,0.1);
+            }
+            
+            .metric-label {
+                font-size: 0.8em;
+                color: #666;
+                text-transform: uppercase;
+            }
+            
+            .metric-value {
+                font-size: 1.4em;
+                font-weight: 700;
+                color: #333;
+            }
+            
+            .fault-stats {
+                font-size: 0.85em;
+                color: #555;
+                margin-bottom: 12px;
+            }
+            
+            .fault-stats:empty {
+                display: none;
+            }
+            
             .hidden {
                 display: none;
             }
@@ -408,6 +831,14 @@ async def chaos_dashboard():
                 <button onclick="refreshStatus()">🔄 Refresh Status</button>
             </div>
             
+            <div class="metrics-bar" id="metrics-bar">
+                <div class="metric"><span class="metric-label">RPS</span><span class="metric-value" id="metric-rps">-</span></div>
+                <div class="metric"><span class="metric-label">p99</span><span class="metric-value" id="metric-p99">-</span></div>
+                <div class="metric"><span class="metric-label">RSS</span><span class="metric-value" id="metric-rss">-</span></div>
+                <div class="metric"><span class="metric-label">CPU</span><span class="metric-value" id="metric-cpu">-</span></div>
+                <div class="metric"><span class="metric-label">Leaked connections</span><span class="metric-value" id="metric-leaked">-</span></div>
+            </div>
+            
             <div id="faults-container"></div>
         </div>
 
@@ -416,7 +847,7 @@ async def chaos_dashboard():
                 {
                     id: 'memory_leak',
                     name: '💾 Memory Leak',
-                    description: 'Gradually consumes memory until container limit',
+                    description: 'Ramps memory usage towards the container limit',
                     sliderLabel: 'Time to 95% RAM (minutes)',
                     sliderMin: 1,
                     sliderMax: 30,
@@ -426,7 +857,7 @@ async def chaos_dashboard():
                 {
                     id: 'cpu_spike',
                     name: '⚡ CPU Spike',
-                    description: 'Burns CPU cycles in background thread',
+                    description: 'Holds container CPU at the target with burner processes',
                     sliderLabel: 'CPU utilization (%)',
                     sliderMin: 0,
                     sliderMax: 100,
@@ -472,6 +903,46 @@ async def chaos_dashboard():
                     sliderMax: 100,
                     sliderStep: 5,
                     sliderUnit: '%'
+                },
+                {
+                    id: 'db_latency',
+                    name: '🐢 Query Latency',
+                    description: 'Delays each database query by a lognormal (or bimodal) random amount',
+                    sliderLabel: 'Median added latency (ms)',
+                    sliderMin: 0,
+                    sliderMax: 2000,
+                    sliderStep: 10,
+                    sliderUnit: 'ms'
+                },
+                {
+                    id: 'db_pool_exhaustion',
+                    name: '🚰 Pool Exhaustion',
+                    description: 'Holds connection pool slots so requests queue and time out',
+                    sliderLabel: 'Pool slots held (%)',
+                    sliderMin: 0,
+                    sliderMax: 100,
+                    sliderStep: 10,
+                    sliderUnit: '%'
+                },
+                {
+                    id: 'db_connection_drop',
+                    name: '✂️ Connection Drops',
+                    description: 'Terminates the database connection in the middle of queries',
+                    sliderLabel: 'Queries dropped (%)',
+                    sliderMin: 0,
+                    sliderMax: 100,
+                    sliderStep: 1,
+                    sliderUnit: '%'
+                },
+                {
+                    id: 'db_slow_connect',
+                    name: '🔗 Slow Connect',
+                    description: 'Delays opening new database connections',
+                    sliderLabel: 'Connect delay (ms)',
+                    sliderMin: 0,
+                    sliderMax: 10000,
+                    sliderStep: 100,
+                    sliderUnit: 'ms'
                 }
             ];
 
@@ -486,7 +957,6 @@ async def chaos_dashboard():
                     headers: {'Content-Type': 'application/json'},
                     body: JSON.stringify({enabled: true, intensity: intensity})
                 });
-                await refreshStatus();
             }
 
             async function disableFault(faultId) {
@@ -495,12 +965,10 @@ async def chaos_dashboard():
                     headers: {'Content-Type': 'application/json'},
                     body: JSON.stringify({enabled: false})
                 });
-                await refreshStatus();
             }
 
             async function disableAll() {
                 await fetch('/admin/chaos/disable-all', {method: 'POST'});
-                await refreshStatus();
             }
 
             async function crashApp() {
@@ -514,72 +982,144 @@ async def chaos_dashboard():
                 }
             }
 
-            async function refreshStatus() {
-                const status = await fetchStatus();
-                const container = document.getElementById('faults-container');
-                
-                // Store current slider values before refresh
-                const currentSliderValues = {};
-                faults.forEach(fault => {
-                    const slider = document.getElementById(`${fault.id}-slider`);
-                    if (slider) {
-                        currentSliderValues[fault.id] = slider.value;
-                    }
-                });
-                
-                container.innerHTML = '';
+            // Last rendered state per fault, so only cards that changed are touched
+            const renderedState = {};
+            let pollTimer = null;
 
-                faults.forEach(fault => {
-                    const state = status[fault.id];
-                    // Use stored slider value if available, otherwise use server state
-                    const sliderValue = currentSliderValues[fault.id] || state.intensity;
-                    
-                    const card = document.createElement('div');
-                    card.className = `fault-card ${state.enabled ? 'enabled' : ''}`;
-                    card.innerHTML = `
-                        <div class="fault-header">
-                            <div class="fault-name">${fault.name}</div>
-                            <div class="fault-status ${state.enabled ? 'status-enabled' : 'status-disabled'}">
-                                ${state.enabled ? 'ENABLED' : 'DISABLED'}
+            function formatBytes(bytes) {
+                if (bytes === null || bytes === undefined) return '-';
+                return bytes >= 1024 ** 3 ? `${(bytes / 1024 ** 3).toFixed(2)} GB` : `${Math.round(bytes / 1024 ** 2)} MB`;
+            }
+
+            function formatStats(faultId, stats) {
+                if (!stats) return '';
+                if (faultId === 'cpu_spike') {
+                    return `Achieved ${stats.achieved_percent}% of ${stats.target_percent}% target · ` +
+                        `${stats.burner_processes} burners at ${stats.duty_cycle_percent}% duty · ` +
+                        `RPS ${stats.baseline_rps} → ${stats.current_rps}`;
+                }
+                if (faultId === 'memory_leak') {
+                    return `${stats.profile}: ${formatBytes(stats.allocated_bytes)} of ${formatBytes(stats.target_bytes)} target · ` +
+                        `RSS ${stats.rss_percent_of_limit}% of ${formatBytes(stats.limit_bytes)} limit`;
+                }
+                if (faultId === 'db_pool_exhaustion') {
+                    return `${stats.held_slots} of ${stats.pool_size} pool slots held`;
+                }
+                return '';
+            }
+
+            function formatScope(scope) {
+                if (!scope) return '';
+                const parts = [];
+                if (scope.routes.length) parts.push(`routes ${scope.routes.join(', ')}`);
+                if (scope.query_types.length) parts.push(`${scope.query_types.join('/')} queries`);
+                return `Only ${parts.join(', ')}`;
+            }
+
+            function createCard(fault, state) {
+                const card = document.createElement('div');
+                card.id = `${fault.id}-card`;
+                card.className = 'fault-card';
+                card.innerHTML = `
+                    <div class="fault-header">
+                        <div class="fault-name">${fault.name}</div>
+                        <div class="fault-status status-disabled">DISABLED</div>
+                    </div>
+                    <div class="fault-description">${fault.description}</div>
+                    <div class="fault-stats"></div>
+                    <div class="controls">
+                        <div class="slider-container">
+                            <div class="slider-label">
+                                <span>${fault.sliderLabel}</span>
+                                <span id="${fault.id}-value">${state.intensity}${fault.sliderUnit}</span>
                             </div>
+                            <input type="range" 
+                                id="${fault.id}-slider"
+                                min="${fault.sliderMin}" 
+                                max="${fault.sliderMax}" 
+                                step="${fault.sliderStep}"
+                                value="${state.intensity}"
+                                oninput="document.getElementById('${fault.id}-value').textContent = this.value + '${fault.sliderUnit}'">
                         </div>
-                        <div class="fault-description">${fault.description}</div>
-                        <div class="controls">
-                            <div class="slider-container">
-                                <div class="slider-label">
-                                    <span>${fault.sliderLabel}</span>
-                                    <span id="${fault.id}-value">${sliderValue}${fault.sliderUnit}</span>
-                                </div>
-                                <input type="range" 
-                                    id="${fault.id}-slider"
-                                    min="${fault.sliderMin}" 
-                                    max="${fault.sliderMax}" 
-                                    step="${fault.sliderStep}"
-                                    value="${sliderValue}"
-                                    oninput="document.getElementById('${fault.id}-value').textContent = this.value + '${fault.sliderUnit}'">
-                            </div>
-                            <div class="action-buttons">
-                                <button class="btn-enable" onclick="enableFault('${fault.id}', document.getElementById('${fault.id}-slider').value)">
-                                    ▶️ Enable
-                                </button>
-                                <button class="btn-disable" onclick="disableFault('${fault.id}')">
-                                    ⏹️ Disable
-                                </button>
-                            </div>
+                        <div class="action-buttons">
+                            <button class="btn-enable" onclick="enableFault('${fault.id}', document.getElementById('${fault.id}-slider').value)">
+                                ▶️ Enable
+                            </button>
+                            <button class="btn-disable" onclick="disableFault('${fault.id}')">
+                                ⏹️ Disable
+                            </button>
                         </div>
-                    `;
-                    container.appendChild(card);
+                    </div>
+                `;
+                return card;
+            }
+
+            // Patch the cards whose state differs from what is on screen; the
+            // slider keeps whatever value the user has dialed in
+            function renderFaults(status) {
+                const container = document.getElementById('faults-container');
+                faults.forEach(fault => {
+                    const state = status[fault.id];
+                    if (!state) return;
+                    const key = JSON.stringify(state);
+                    if (renderedState[fault.id] === key) return;
+                    renderedState[fault.id] = key;
+
+                    let card = document.getElementById(`${fault.id}-card`);
+                    if (!card) {
+                        card = createCard(fault, state);
+                        container.appendChild(card);
+                    }
+                    card.classList.toggle('enabled', state.enabled);
+                    const badge = card.querySelector('.fault-status');
+                    badge.className = `fault-status ${state.enabled ? 'status-enabled' : 'status-disabled'}`;
+                    badge.textContent = state.enabled ? 'ENABLED' : 'DISABLED';
+                    card.querySelector('.fault-stats').textContent =
+                        [formatStats(fault.id, state.stats), formatScope(state.scope)].filter(Boolean).join(' · ');
                 });
                 
                 // Show danger zone after first load
                 document.getElementById('danger-zone').classList.remove('hidden');
             }
 
+            function renderMetrics(metrics) {
+                document.getElementById('metric-rps').textContent = metrics.rps;
+                document.getElementById('metric-p99').textContent = metrics.p99_ms === null ? '-' : `${metrics.p99_ms} ms`;
+                document.getElementById('metric-rss').textContent = formatBytes(metrics.rss_bytes);
+                document.getElementById('metric-cpu').textContent = `${metrics.cpu_percent}%`;
+                document.getElementById('metric-leaked').textContent = metrics.leaked_connections;
+            }
+
+            async function refreshStatus() {
+                renderFaults(await fetchStatus());
+            }
+
+            // Server push: one producer on the server fans state changes and
+            // metrics out to every open dashboard
+            function connectStream() {
+                const source = new EventSource('/admin/chaos/stream');
+                source.addEventListener('snapshot', event => {
+                    const data = JSON.parse(event.data);
+                    renderFaults(data.faults);
+                    renderMetrics(data.metrics);
+                    if (pollTimer) {
+                        clearInterval(pollTimer);
+                        pollTimer = null;
+                    }
+                });
+                source.addEventListener('faults', event => renderFaults(JSON.parse(event.data)));
+                source.addEventListener('metrics', event => renderMetrics(JSON.parse(event.data)));
+                source.onerror = () => {
+                    // EventSource reconnects by itself; fall back to polling only if it gives up
+                    if (source.readyState === EventSource.CLOSED && !pollTimer) {
+                        pollTimer = setInterval(refreshStatus, 5000);
+                    }
+                };
+            }
+
             // Initial load
             refreshStatus();
-            
-            // Auto-refresh every 5 seconds
-            setInterval(refreshStatus, 5000);
+            connectStream();
         </script>
 
         <div class="danger-zone hidden" id="danger-zone">
@@ -595,30 +1135,60 @@ async def chaos_dashboard():
 @router.get("/status")
 async def get_chaos_status():
     """Get current status of all chaos faults"""
-    # Return a serializable version without thread objects
-    status = {}
-    for fault_type, state in chaos_state.items():
-        status[fault_type] = {
-            "enabled": state["enabled"],
-            "intensity": state["intensity"]
-        }
-    return status
+    return chaos_status()
+
+@router.get("/stream")
+async def stream_chaos_status():
+    """Stream fault state changes and live metrics to the dashboard (Server-Sent Events)"""
+    return StreamingResponse(
+        chaos_stream.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/{fault_type}/enable")
 async def enable_chaos_fault(fault_type: str, config: ChaosConfig):
     """Enable a specific chaos fault"""
+    _enable_fault(fault_type, config)
+    
+    chaos_stream.notify()
+    return {
+        "status": "enabled",
+        "fault": fault_type,
+        "config": {
+            "enabled": chaos_state[fault_type]["enabled"],
+            "intensity": chaos_state[fault_type]["intensity"]
+        }
+    }
+
+def _enable_fault(fault_type: str, config: ChaosConfig) -> None:
+    """Turn a fault on (or update its settings) and start its background work"""
     if fault_type not in chaos_state:
         raise HTTPException(status_code=404, detail=f"Fault type '{fault_type}' not found")
     
+    if fault_type == "memory_leak" and config.profile is not None and config.profile not in MEMORY_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown memory profile '{config.profile}' (expected one of {', '.join(MEMORY_PROFILES)})")
+    
+    # Each core is a burner process; more than the host has only adds processes
+    max_cores = os.cpu_count() or 1
+    if fault_type == "cpu_spike" and config.cores is not None and not 1 <= config.cores <= max_cores:
+        raise HTTPException(status_code=400, detail=f"cores must be between 1 and {max_cores}")
+    
+    if fault_type.startswith("db_"):
+        _configure_db_fault(fault_type, config)
+    
     chaos_state[fault_type]["enabled"] = True
     if config.intensity is not None:
         chaos_state[fault_type]["intensity"] = config.intensity
     
     # Special handling for CPU spike - start background thread
     if fault_type == "cpu_spike":
+        if config.cores is not None:
+            chaos_state["cpu_spike"]["cores"] = config.cores
         current_thread = chaos_state["cpu_spike"]["thread"]
         # Start new thread if none exists or if the existing one is not alive
         if current_thread is None or not current_thread.is_alive():
+            chaos_state["cpu_spike"]["run_id"] += 1
             thread = threading.Thread(target=cpu_burn_thread, daemon=True)
             thread.start()
             chaos_state["cpu_spike"]["thread"] = thread
@@ -626,12 +1196,27 @@ async def enable_chaos_fault(fault_type: str, config: ChaosConfig):
     # Special handling for memory leak - start background thread
     elif fault_type == "memory_leak":
         current_thread = chaos_state["memory_leak"]["thread"]
+        if config.profile is not None and config.profile != chaos_state["memory_leak"]["profile"]:
+            chaos_state["memory_leak"]["profile"] = config.profile
+            # Restart so the new profile begins from the start of its ramp
+            current_thread = None
         # Start new thread if none exists or if the existing one is not alive
         if current_thread is None or not current_thread.is_alive():
+            chaos_state["memory_leak"]["run_id"] += 1
             thread = threading.Thread(target=memory_leak_thread, daemon=True)
             thread.start()
             chaos_state["memory_leak"]["thread"] = thread
     
+    # Special handling for pool exhaustion - start background thread holding pool slots
+    elif fault_type == "db_pool_exhaustion":
+        import db
+        current_thread = chaos_state["db_pool_exhaustion"]["thread"]
+        if current_thread is None or not current_thread.is_alive():
+            chaos_state["db_pool_exhaustion"]["run_id"] += 1
+            thread = threading.Thread(target=db.pool_exhaustion_thread, daemon=True)
+            thread.start()
+            chaos_state["db_pool_exhaustion"]["thread"] = thread
+    
     # Special handling for crash - trigger immediate or delayed crash
     elif fault_type == "crash_app":
         delay = chaos_state["crash_app"]["intensity"]
@@ -644,34 +1229,29 @@ async def enable_chaos_fault(fault_type: str, config: ChaosConfig):
         
         thread = threading.Thread(target=crash_with_delay, daemon=False)
         thread.start()
-    
-    return {
-        "status": "enabled",
-        "fault": fault_type,
-        "config": {
-            "enabled": chaos_state[fault_type]["enabled"],
-            "intensity": chaos_state[fault_type]["intensity"]
-        }
-    }
 
-@router.post("/{fault_type}/disable")
-async def disable_chaos_fault(fault_type: str, config: ChaosConfig):
-    """Disable a specific chaos fault"""
-    if fault_type not in chaos_state:
-        raise HTTPException(status_code=404, detail=f"Fault type '{fault_type}' not found")
-    
+def _disable_fault(fault_type: str) -> None:
+    """Turn a fault off and undo its side effects"""
     chaos_state[fault_type]["enabled"] = False
     
     # Special handling for different fault types
     if fault_type == "memory_leak":
-        # Clear leaked memory
-        chaos_state["memory_leak"]["leak_data"].clear()
+        # Unmap leaked memory right away rather than waiting for the thread
+        release_leaked_memory()
         chaos_state["memory_leak"]["thread"] = None
+        if chaos_state["memory_leak"]["stats"]:
+            chaos_state["memory_leak"]["stats"]["allocated_bytes"] = 0
+            chaos_state["memory_leak"]["stats"]["allocated_percent_of_target"] = 0
         gc.collect()
         logger.info("Memory buffers released and garbage collection completed")
     
+    elif fault_type == "db_pool_exhaustion":
+        # The thread hands its slots back within one tick
+        chaos_state["db_pool_exhaustion"]["thread"] = None
+    
     elif fault_type == "cpu_spike":
-        # Clear thread reference so it can be restarted
+        # The thread stops its burner processes within one control interval;
+        # keep the final stats as the report of achieved vs target utilization
         chaos_state["cpu_spike"]["thread"] = None
         logger.debug("Background processing thread stopped")
     
@@ -684,7 +1264,28 @@ async def disable_chaos_fault(fault_type: str, config: ChaosConfig):
                 pass
         chaos_state["connection_leak"]["leaked_connections"].clear()
         logger.info("Database connection cleanup completed")
+
+def shutdown_chaos(timeout: float = 5.0) -> None:
+    """Disable every fault and wait for the background threads to exit (called on shutdown)"""
+    threads = [chaos_state[name]["thread"] for name in ("cpu_spike", "memory_leak", "db_pool_exhaustion")]
+    for fault_type, state in chaos_state.items():
+        if state["enabled"] or state.get("leaked_connections"):
+            _disable_fault(fault_type)
+    # Joining matters for cpu_spike: its thread owns the burner processes
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        if thread is not None:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+@router.post("/{fault_type}/disable")
+async def disable_chaos_fault(fault_type: str, config: ChaosConfig):
+    """Disable a specific chaos fault"""
+    if fault_type not in chaos_state:
+        raise HTTPException(status_code=404, detail=f"Fault type '{fault_type}' not found")
+    
+    _disable_fault(fault_type)
     
+    chaos_stream.notify()
     return {"status": "disabled", "fault": fault_type}
 
 @router.post("/disable-all")
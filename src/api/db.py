@@ -0,0 +1,357 @@
+"""
+Database Connection Module
+PostgreSQL connection pool shared by the storage backend and admin tooling
+"""
+
+import os
+import sys
+import math
+import time
+import logging
+import random
+import threading
+import traceback
+import contextvars
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from fastapi import APIRouter, HTTPException, Query
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import RealDictCursor
+
+import dbfaults
+import prepared
+import querystats
+from chaos import chaos_state
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+DATABASE_URL = os.getenv("DATABASE_URL", "")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))  # Connections opened at startup and kept warm
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))  # Upper bound on connections per worker
+DB_POOL_MAX_IDLE = int(os.getenv("DB_POOL_MAX_IDLE", str(DB_POOL_MAX_SIZE)))  # Returned connections kept open for reuse
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # Seconds to wait for a free connection
+DB_CHECKOUT_LEAK_SECONDS = float(os.getenv("DB_CHECKOUT_LEAK_SECONDS", "30"))  # Checkouts held longer are reported as leaks (0 = off)
+DB_RECLAIM_LEAKED = os.getenv("DB_RECLAIM_LEAKED", "false").lower() == "true"  # Close orphaned leaked connections automatically
+DB_CHECKOUT_STACK_DEPTH = int(os.getenv("DB_CHECKOUT_STACK_DEPTH", "8"))  # Frames of acquisition stack kept per checkout
+
+# Database connection pool
+db_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises immediately when exhausted; the semaphore makes
+# callers queue for up to DB_POOL_TIMEOUT instead.
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+
+# Checkout tracking: every borrowed connection, keyed by id(conn). Whoever
+# removes the entry (release_db_connection or the leak detector) owns the
+# pool slot and gives it back, so a reclaimed connection is never released twice.
+_checkouts: Dict[int, Dict[str, Any]] = {}
+_checkout_lock = threading.Lock()
+_checkout_counters = {"checkouts": 0, "returns": 0, "leaks_detected": 0, "reclaimed": 0, "late_returns": 0}
+_leak_detector: Optional[threading.Thread] = None
+# Checkouts made outside a request are only reclaimed once held this many
+# times DB_CHECKOUT_LEAK_SECONDS without running a statement
+UNOWNED_RECLAIM_FACTOR = 10
+
+# Set by middleware to an Event that fires when the request has finished. A
+# threadpool thread outlives every request it serves, so this - not the
+# thread - tells whether a connection's owner is gone.
+current_request: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("current_request", default=None)
+
+class _Cursor(dbfaults.ChaosCursor, querystats.InstrumentedCursor):
+    """
+    RealDictCursor for pooled connections: applies the query-level chaos faults,
+    then times the statement. Injected delay happens before the timer starts, so
+    query stats show what the server spent, not what chaos added.
+    """
+
+class _ConnectionPool(ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool whose new connections go through the db_slow_connect
+    fault, and which keeps up to DB_POOL_MAX_IDLE returned connections open.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # After opening the initial connections, minconn is only used by
+        # putconn as the number of idle connections to keep. Left at
+        # DB_POOL_MIN_SIZE, every connection beyond it would be closed on
+        # return, losing its prepared statements and paying a reconnect.
+        self.minconn = max(self.minconn, DB_POOL_MAX_IDLE)
+
+    def _connect(self, key=None):
+        dbfaults.apply_connect_faults()
+        return super()._connect(key)
+
+def init_pool() -> ThreadedConnectionPool:
+    """Create the connection pool (opens DB_POOL_MIN_SIZE connections)"""
+    global db_pool, _leak_detector
+    with _pool_lock:
+        if _leak_detector is None and DB_CHECKOUT_LEAK_SECONDS > 0:
+            _leak_detector = threading.Thread(target=leak_detector_thread, daemon=True)
+            _leak_detector.start()
+        if db_pool is None:
+            db_pool = _ConnectionPool(
+                DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DATABASE_URL,
+                connection_factory=prepared.PreparingConnection, cursor_factory=_Cursor
+            )
+        return db_pool
+
+def close_pool() -> None:
+    """Close every pooled connection"""
+    global db_pool
+    with _pool_lock:
+        if db_pool is not None:
+            db_pool.closeall()
+            db_pool = None
+
+def get_db_connection():
+    """Get a database connection from the pool - return it with release_db_connection()"""
+    if not DATABASE_URL:
+        raise HTTPException(status_code=500, detail="Database connection not configured")
+
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT):
+        logger.error("Database connection error: connection pool exhausted")
+        raise HTTPException(status_code=503, detail="Database connection pool exhausted")
+
+    pool = conn = None
+    try:
+        pool = db_pool or init_pool()
+        conn = pool.getconn()
+        
+        # Chaos: Slow connect - swap the pooled connection for a new one so this checkout pays the connect delay
+        if dbfaults.should_reconnect():
+            pool.putconn(conn, close=True)
+            conn = None
+            conn = pool.getconn()
+
+        # Chaos: Connection leak simulation
+        if chaos_state["connection_leak"]["enabled"] and random.randint(1, 100) <= chaos_state["connection_leak"]["intensity"]:
+            # Silently leak an extra server connection - store it so it's not garbage collected
+            leaked = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+            chaos_state["connection_leak"]["leaked_connections"].append(leaked)
+
+        _track_checkout(conn)
+        return conn
+    except Exception as e:
+        if conn is not None:
+            pool.putconn(conn, close=True)
+        _pool_slots.release()
+        logger.error(f"Database connection error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+
+def _track_checkout(conn) -> None:
+    # Frames are captured without source lines; those are only read when a leak is reported
+    stack = traceback.StackSummary.extract(
+        traceback.walk_stack(sys._getframe(2)), limit=DB_CHECKOUT_STACK_DEPTH, lookup_lines=False
+    )
+    record = {
+        "conn": conn,
+        "route": dbfaults.current_route.get() or None,
+        "thread": threading.current_thread(),
+        "request": current_request.get(),
+        "started": time.monotonic(),
+        "started_at": datetime.utcnow(),
+        "stack": stack,
+        "leak_reported": False,
+    }
+    with _checkout_lock:
+        _checkouts[id(conn)] = record
+        _checkout_counters["checkouts"] += 1
+
+def release_db_connection(conn, discard: bool = False) -> None:
+    """Return a connection to the pool; broken connections are closed instead of reused"""
+    with _checkout_lock:
+        record = _checkouts.pop(id(conn), None)
+        if record is None:
+            # Reclaimed by the leak detector, which already gave back its slot
+            _checkout_counters["late_returns"] += 1
+            logger.warning("Connection returned after it was reclaimed as leaked")
+            return
+        _checkout_counters["returns"] += 1
+    try:
+        pool = db_pool
+        if pool is None:
+            conn.close()
+            return
+        # putconn rolls back anything left open before the connection is reused
+        pool.putconn(conn, close=discard or conn.closed != 0)
+    except Exception as e:
+        logger.warning(f"Error returning connection to pool: {str(e)}")
+    finally:
+        _pool_slots.release()
+
+_TRANSACTION_STATUS = {
+    psycopg2.extensions.TRANSACTION_STATUS_IDLE: "idle",
+    psycopg2.extensions.TRANSACTION_STATUS_ACTIVE: "active",
+    psycopg2.extensions.TRANSACTION_STATUS_INTRANS: "idle in transaction",
+    psycopg2.extensions.TRANSACTION_STATUS_INERROR: "idle in failed transaction",
+}
+
+def _format_checkout(record: Dict[str, Any], now: float) -> Dict[str, Any]:
+    conn = record["conn"]
+    return {
+        "route": record["route"],
+        "thread": record["thread"].name,
+        "held_seconds": round(now - record["started"], 1),
+        "checked_out_at": record["started_at"].isoformat(),
+        "transaction_status": _TRANSACTION_STATUS.get(conn.info.transaction_status, "unknown") if not conn.closed else "closed",
+        "leaked": record["leak_reported"],
+        # Outermost call first, ending at the caller of get_db_connection()
+        "stack": [line.rstrip() for line in reversed(record["stack"].format())],
+    }
+
+def _is_orphaned(record: Dict[str, Any], now: float) -> bool:
+    """
+    A leaked checkout nobody can still be using: its request has finished,
+    or, outside requests, its thread has exited or it has sat without running
+    a statement for UNOWNED_RECLAIM_FACTOR times the leak threshold
+    """
+    conn = record["conn"]
+    if conn.closed:
+        return True
+    if record["request"] is not None:
+        # A live request may be idle in a transaction or sleeping between statements
+        return record["request"].is_set()
+    if not record["thread"].is_alive():
+        return True
+    return (
+        now - record["started"] >= DB_CHECKOUT_LEAK_SECONDS * UNOWNED_RECLAIM_FACTOR
+        and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_ACTIVE
+    )
+
+def sweep_checkouts(reclaim: bool = False) -> Dict[str, Any]:
+    """Report checkouts held past DB_CHECKOUT_LEAK_SECONDS, optionally closing the orphaned ones"""
+    now = time.monotonic()
+    newly_leaked = []
+    with _checkout_lock:
+        leaked = [
+            (key, record) for key, record in _checkouts.items()
+            if now - record["started"] >= DB_CHECKOUT_LEAK_SECONDS
+        ]
+        for _, record in leaked:
+            if not record["leak_reported"]:
+                record["leak_reported"] = True
+                _checkout_counters["leaks_detected"] += 1
+                newly_leaked.append(record)
+
+    for record in newly_leaked:
+        details = _format_checkout(record, now)
+        logger.warning(
+            f"Connection held for {details['held_seconds']}s by {details['route'] or 'background task'} "
+            f"({details['thread']}), acquired at:\n" + "\n".join(details["stack"])
+        )
+
+    reclaimed = 0
+    if reclaim:
+        for key, record in leaked:
+            if not _is_orphaned(record, now):
+                continue
+            with _checkout_lock:
+                if _checkouts.pop(key, None) is None:
+                    continue  # Returned in the meantime
+                _checkout_counters["reclaimed"] += 1
+            try:
+                pool = db_pool
+                if pool is not None:
+                    pool.putconn(record["conn"], close=True)
+                else:
+                    record["conn"].close()
+            except Exception as e:
+                logger.warning(f"Error closing reclaimed connection: {str(e)}")
+            finally:
+                _pool_slots.release()
+            reclaimed += 1
+        if reclaimed:
+            logger.warning(f"Reclaimed {reclaimed} leaked connection(s)")
+
+    return {"leaked": len(leaked), "newly_detected": len(newly_leaked), "reclaimed": reclaimed}
+
+def leak_detector_thread():
+    """Background thread that sweeps for leaked checkouts"""
+    while True:
+        time.sleep(max(1.0, DB_CHECKOUT_LEAK_SECONDS / 4))
+        try:
+            sweep_checkouts(reclaim=DB_RECLAIM_LEAKED)
+        except Exception as e:
+            logger.error(f"Leak detector error: {str(e)}")
+
+def checkout_status(include_all: bool = False) -> Dict[str, Any]:
+    """Counters and the checkouts currently held (only leaked ones unless include_all)"""
+    now = time.monotonic()
+    with _checkout_lock:
+        records = list(_checkouts.values())
+        counters = dict(_checkout_counters)
+    held = [
+        _format_checkout(record, now) for record in records
+        if include_all or now - record["started"] >= DB_CHECKOUT_LEAK_SECONDS
+    ]
+    held.sort(key=lambda checkout: checkout["held_seconds"], reverse=True)
+    return {
+        **counters,
+        "checked_out": len(records),
+        "pool_size": DB_POOL_MAX_SIZE,
+        "leak_threshold_seconds": DB_CHECKOUT_LEAK_SECONDS,
+        "auto_reclaim": DB_RECLAIM_LEAKED,
+        "chaos_leaked_connections": len(chaos_state["connection_leak"]["leaked_connections"]),
+        "connections": held,
+    }
+
+def pool_exhaustion_thread():
+    """Background thread that holds a share of the pool's slots so requests queue for the rest"""
+    state = chaos_state["db_pool_exhaustion"]
+    run_id = state["run_id"]
+    held = 0
+    logger.info("Connection pool reservation started")
+    try:
+        # A newer thread (disable + re-enable) takes over by bumping run_id
+        while state["enabled"] and state["run_id"] == run_id:
+            target = math.ceil(DB_POOL_MAX_SIZE * state["intensity"] / 100)
+            # Slots in use are taken as requests return them
+            while held < target and _pool_slots.acquire(timeout=0.2):
+                held += 1
+            while held > target:
+                _pool_slots.release()
+                held -= 1
+            state["stats"] = {"held_slots": held, "pool_size": DB_POOL_MAX_SIZE}
+            time.sleep(0.2)
+    finally:
+        for _ in range(held):
+            _pool_slots.release()
+        if state["stats"]:
+            state["stats"]["held_slots"] = 0
+    logger.info("Connection pool reservation released")
+
+def warm_pool() -> int:
+    """Open and validate DB_POOL_MIN_SIZE connections and prepare the hot statements on them"""
+    init_pool()
+    borrowed = []
+    try:
+        for _ in range(DB_POOL_MIN_SIZE):
+            conn = get_db_connection()
+            borrowed.append(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            prepared.prepare_all(conn)
+            conn.rollback()
+    finally:
+        for conn in borrowed:
+            release_db_connection(conn)
+    return len(borrowed)
+
+# Create API router
+router = APIRouter(prefix="/admin/db", tags=["Admin"])
+
+@router.get("/connections")
+def get_connection_checkouts(include_all: bool = Query(False, alias="all")):
+    """Get checkout counters and connections held past the leak threshold (all=true lists every checkout)"""
+    return checkout_status(include_all=include_all)
+
+@router.post("/connections/reclaim")
+def reclaim_leaked_connections():
+    """Close orphaned connections held past the leak threshold and free their pool slots"""
+    return sweep_checkouts(reclaim=True)
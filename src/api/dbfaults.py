@@ -0,0 +1,97 @@
+"""
+Database Fault Injection Module
+Chaos faults applied at the query and connection layer, scoped by route and query type
+"""
+
+import math
+import random
+import time
+import logging
+import contextvars
+from typing import Dict, Any
+
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor
+
+import prepared
+from chaos import chaos_state
+
+logger = logging.getLogger(__name__)
+
+QUERY_TYPES = ("select", "insert", "update", "delete", "other")
+LATENCY_DISTRIBUTIONS = ("lognormal", "bimodal")
+BIMODAL_JITTER = 0.2  # Lognormal sigma applied around each bimodal peak
+
+# Path of the request being served. Set by middleware; the threadpool runs
+# handlers in a copy of the request's context, so it is visible here.
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="")
+
+def query_type(query) -> str:
+    """select, insert, update, delete or other, from the statement's first keyword"""
+    if isinstance(query, bytes):
+        query = query.decode(errors="ignore")
+    words = str(query).split(None, 2)
+    keyword = words[0].lower() if words else ""
+    if keyword == "execute" and len(words) > 1 and words[1] in prepared.statements:
+        # A prepared statement has the type of the query it was prepared from
+        keyword = prepared.statements[words[1]].sql.split(None, 1)[0].lower()
+    return keyword if keyword in QUERY_TYPES else "other"
+
+def in_scope(state: Dict[str, Any], statement_type: str = None) -> bool:
+    """Whether a fault applies to the current route (path prefixes) and statement type; empty lists match everything"""
+    routes = state.get("routes")
+    if routes and not any(current_route.get().startswith(route) for route in routes):
+        return False
+    query_types = state.get("query_types")
+    if statement_type is not None and query_types and statement_type not in query_types:
+        return False
+    return True
+
+def sample_latency_ms(state: Dict[str, Any]) -> float:
+    """Draw one added latency from the db_latency distribution"""
+    if state["distribution"] == "bimodal":
+        # Most queries around intensity ms, tail_percent of them around tail_ms
+        peak = state["tail_ms"] if random.uniform(0, 100) < state["tail_percent"] else state["intensity"]
+        return peak * random.lognormvariate(0, BIMODAL_JITTER)
+    # Median intensity ms; sigma sets how heavy the tail is (p99 = median * e^(2.33 * sigma))
+    return random.lognormvariate(math.log(max(state["intensity"], 0.001)), state["sigma"])
+
+def apply_query_faults(cursor, query) -> None:
+    """Delay the statement and/or kill its connection, per the db_latency and db_connection_drop faults"""
+    latency = chaos_state["db_latency"]
+    drop = chaos_state["db_connection_drop"]
+    if not latency["enabled"] and not drop["enabled"]:
+        return
+    statement_type = query_type(query)
+
+    # Runs in a threadpool worker (storage endpoints are plain functions), so
+    # sleeping here holds a real connection without blocking the event loop
+    if latency["enabled"] and in_scope(latency, statement_type):
+        time.sleep(sample_latency_ms(latency) / 1000)
+
+    if drop["enabled"] and in_scope(drop, statement_type) and random.uniform(0, 100) < drop["intensity"]:
+        # Have the server terminate our own backend: the caller gets the same
+        # OperationalError, rollback and broken connection as a real drop
+        raw = cursor.connection.cursor(cursor_factory=psycopg2.extensions.cursor)
+        try:
+            raw.execute("SELECT pg_terminate_backend(pg_backend_pid())")
+        finally:
+            raw.close()
+
+def apply_connect_faults() -> None:
+    """Delay opening a new server connection, per the db_slow_connect fault"""
+    state = chaos_state["db_slow_connect"]
+    if state["enabled"] and in_scope(state):
+        time.sleep(state["intensity"] / 1000)
+
+def should_reconnect() -> bool:
+    """Whether this checkout should replace its pooled connection with a new one (so it pays the slow connect)"""
+    state = chaos_state["db_slow_connect"]
+    return state["enabled"] and in_scope(state) and random.uniform(0, 100) < state["reconnect_percent"]
+
+class ChaosCursor(RealDictCursor):
+    """RealDictCursor that applies the database faults before each statement"""
+
+    def execute(self, query, vars=None):
+        apply_query_faults(self, query)
+        return super().execute(query, vars)
@@ -0,0 +1,392 @@
+"""
+Chaos Experiments Module
+Runs a timeline of chaos faults against the local API under a built-in load profile and reports the SLO impact
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import random
+import uuid
+import logging
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+from chaos import chaos_state, chaos_stream, ChaosConfig, _enable_fault, _disable_fault
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+EXPERIMENT_TARGET_URL = os.getenv("EXPERIMENT_TARGET_URL", f"http://127.0.0.1:{os.getenv('PORT', '8000')}")  # API the load is sent to
+EXPERIMENT_REPORT_DIR = os.getenv("EXPERIMENT_REPORT_DIR", "/tmp/chaos-experiments")  # Where JSON reports are written
+EXPERIMENT_HISTORY = 20  # Finished experiments kept in memory
+
+# Recovery: the first run of RECOVERY_WINDOW_SECONDS consecutive seconds that
+# are back within tolerance of the baseline phase
+RECOVERY_WINDOW_SECONDS = 5
+RECOVERY_P99_TOLERANCE = 1.25  # p99 may be up to 25% above baseline...
+RECOVERY_P99_SLACK_MS = 5.0  # ...plus this much, so a 2 ms baseline isn't held to 2.5 ms
+RECOVERY_ERROR_TOLERANCE = 0.01  # Error rate may be up to 1 percentage point above baseline
+
+PHASE_OVERRUN_TOLERANCE = 0.5  # Seconds a phase may run past its planned end before it is flagged
+
+# Faults that would take down the runner itself
+UNSUPPORTED_FAULTS = ("crash_app",)
+
+class LoadProfile(BaseModel):
+    rps: float = Field(20, gt=0)  # Requests per second, sent open-loop
+    concurrency: int = Field(8, ge=1, le=256)  # Client threads
+    paths: List[str] = ["/api/items?limit=20", "/api/items/aggregates"]  # Requested in random order
+    timeout_seconds: float = 10
+
+class ExperimentPhase(BaseModel):
+    name: Optional[str] = None
+    duration_seconds: float = Field(gt=0)
+    faults: Dict[str, int] = {}  # fault -> intensity; faults not listed are disabled for the phase
+
+class ExperimentSpec(BaseModel):
+    name: str = "experiment"
+    phases: List[ExperimentPhase] = Field(min_length=1)
+    load: LoadProfile = LoadProfile()
+    recovery_seconds: float = Field(60, ge=0)  # Fault-free tail appended after the last phase
+
+class LoadGenerator:
+    """
+    Open-loop HTTP load: a pacer thread schedules requests at a fixed rate and
+    client threads send them. Latency is measured from the scheduled time, so
+    when the API stalls the queueing delay is counted instead of hidden.
+    Completion times are kept too, for throughput.
+    """
+
+    def __init__(self, base_url: str, profile: LoadProfile):
+        self.base_url = base_url.rstrip("/")
+        self.profile = profile
+        self.samples: List[Tuple[float, float, float, bool]] = []  # (scheduled, completed, latency_ms, error)
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        self._threads = [threading.Thread(target=self._pace, daemon=True)]
+        self._threads += [threading.Thread(target=self._send, daemon=True) for _ in range(self.profile.concurrency)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop scheduling, drop queued requests and wait for the ones in flight"""
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in range(self.profile.concurrency):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=self.profile.timeout_seconds + 1)
+
+    def _pace(self) -> None:
+        interval = 1.0 / self.profile.rps
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            self._queue.put((next_at, random.choice(self.profile.paths)))
+            next_at += interval
+
+    def _send(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None or self._stop.is_set():
+                return
+            scheduled, path = item
+            error = False
+            try:
+                with urllib.request.urlopen(self.base_url + path, timeout=self.profile.timeout_seconds) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                # 4xx is the client's problem; only server errors count against the SLO
+                error = e.code >= 500
+            except Exception:
+                error = True
+            completed = time.monotonic()
+            with self._lock:
+                self.samples.append((scheduled, completed, (completed - scheduled) * 1000, error))
+
+    def snapshot(self) -> List[Tuple[float, float, float, bool]]:
+        with self._lock:
+            return list(self.samples)
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(samples: List[Tuple[float, float, float, bool]], start: float, end: float) -> Dict[str, Any]:
+    """
+    Error rate and latency percentiles of the requests scheduled in [start, end),
+    and throughput from the successful requests that completed in it
+    """
+    window = [sample for sample in samples if start <= sample[0] < end]
+    latencies = sorted(sample[2] for sample in window if not sample[3])
+    errors = sum(1 for sample in window if sample[3])
+    # Counting by schedule would just echo the offered rate; a stalled API completes fewer
+    completed = sum(1 for sample in samples if start <= sample[1] < end and not sample[3])
+    duration = max(end - start, 1e-9)
+    p50 = _percentile(latencies, 50)
+    p99 = _percentile(latencies, 99)
+    return {
+        "requests": len(window),
+        "errors": errors,
+        "throughput_rps": round(completed / duration, 2),
+        "error_rate": round(errors / len(window), 4) if window else None,
+        "p50_ms": round(p50, 1) if p50 is not None else None,
+        "p99_ms": round(p99, 1) if p99 is not None else None,
+    }
+
+def _deltas(metrics: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    def delta(field, digits):
+        if metrics[field] is None or baseline[field] is None:
+            return None
+        return round(metrics[field] - baseline[field], digits)
+    return {
+        "throughput_change_percent": (
+            round((metrics["throughput_rps"] - baseline["throughput_rps"]) / baseline["throughput_rps"] * 100, 1)
+            if baseline["throughput_rps"] else None
+        ),
+        "p50_delta_ms": delta("p50_ms", 1),
+        "p99_delta_ms": delta("p99_ms", 1),
+        "error_rate_delta": delta("error_rate", 4),
+    }
+
+def recovery_seconds(samples, cleared_at: float, end: float, baseline: Dict[str, Any]) -> Optional[float]:
+    """Seconds from cleared_at until p99 and error rate stay within tolerance of the baseline"""
+    if baseline["p99_ms"] is None:
+        return None
+    max_p99 = baseline["p99_ms"] * RECOVERY_P99_TOLERANCE + RECOVERY_P99_SLACK_MS
+    max_error_rate = (baseline["error_rate"] or 0) + RECOVERY_ERROR_TOLERANCE
+    healthy_run = 0
+    second = 0
+    while cleared_at + second + 1 <= end:
+        metrics = summarize(samples, cleared_at + second, cleared_at + second + 1)
+        healthy = (
+            metrics["requests"] > 0
+            and metrics["error_rate"] <= max_error_rate
+            and (metrics["p99_ms"] is None or metrics["p99_ms"] <= max_p99)
+        )
+        healthy_run = healthy_run + 1 if healthy else 0
+        if healthy_run == RECOVERY_WINDOW_SECONDS:
+            return float(second + 1 - RECOVERY_WINDOW_SECONDS)
+        second += 1
+    return None
+
+class ExperimentRunner:
+    """
+    Runs one experiment at a time on its own thread. The timeline can't share
+    the event loop: faults like slow_responses block it, which would stretch
+    every phase. Faults are switched with the chaos endpoints' own logic.
+    """
+
+    def __init__(self):
+        self.experiments: Dict[str, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._abort = threading.Event()
+
+    def running(self) -> Optional[Dict[str, Any]]:
+        if self._thread is None or not self._thread.is_alive():
+            return None
+        return next((experiment for experiment in self.experiments.values() if experiment["status"] == "running"), None)
+
+    def start(self, spec: ExperimentSpec) -> Dict[str, Any]:
+        for phase in spec.phases:
+            for fault in phase.faults:
+                if fault not in chaos_state:
+                    raise HTTPException(status_code=400, detail=f"Fault type '{fault}' not found")
+                if fault in UNSUPPORTED_FAULTS:
+                    raise HTTPException(status_code=400, detail=f"Fault type '{fault}' can't be used in an experiment")
+        if self.running() is not None:
+            raise HTTPException(status_code=409, detail="An experiment is already running")
+        # A fault left on would run through the baseline phase the report is measured against
+        enabled = [fault for fault, state in chaos_state.items() if state["enabled"]]
+        if enabled:
+            raise HTTPException(status_code=409, detail=f"Disable active faults before starting an experiment: {', '.join(enabled)}")
+
+        # The suffix keeps same-named runs started within a second (on any worker) apart
+        experiment_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{re.sub(r'[^A-Za-z0-9_-]+', '-', spec.name)}-{uuid.uuid4().hex[:6]}"
+        experiment = {
+            "id": experiment_id,
+            "name": spec.name,
+            "status": "running",
+            "started_at": datetime.utcnow().isoformat(),
+            "spec": spec.model_dump(),
+            "current_phase": None,
+            "report": None,
+        }
+        self.experiments[experiment_id] = experiment
+        while len(self.experiments) > EXPERIMENT_HISTORY:
+            self.experiments.pop(next(iter(self.experiments)))
+        self._abort = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(experiment, spec), daemon=True)
+        self._thread.start()
+        return experiment
+
+    async def abort(self) -> None:
+        """Stop the running experiment early; its report covers the phases that ran"""
+        if self._thread is not None and self._thread.is_alive():
+            self._abort.set()
+            await run_in_threadpool(self._thread.join)
+
+    def _switch_fault(self, fault: str, intensity: Optional[int]) -> None:
+        if intensity is None:
+            _disable_fault(fault)
+        else:
+            _enable_fault(fault, ChaosConfig(enabled=True, intensity=intensity))
+        chaos_stream.notify()
+
+    def _run(self, experiment: Dict[str, Any], spec: ExperimentSpec) -> None:
+        phases = list(spec.phases)
+        if spec.recovery_seconds > 0:
+            phases.append(ExperimentPhase(name="recovery", duration_seconds=spec.recovery_seconds))
+
+        # Intensities the timeline overwrites, restored when it ends
+        intensities = {
+            fault: chaos_state[fault]["intensity"]
+            for phase in phases for fault in phase.faults
+        }
+        load = LoadGenerator(EXPERIMENT_TARGET_URL, spec.load)
+        windows = []  # (name, faults, start, end, planned_seconds)
+        cleared = []  # (fault, time, faults still active)
+        active: Dict[str, int] = {}
+        logger.info(f"Experiment {experiment['id']} started: {len(phases)} phases")
+        load.start()
+        # Phases end at fixed offsets from the start, so one slow switch doesn't shift the rest
+        planned_end = time.monotonic()
+        try:
+            for index, phase in enumerate(phases):
+                name = phase.name or f"phase-{index + 1}"
+                experiment["current_phase"] = name
+                started = time.monotonic()
+                planned_end += phase.duration_seconds
+                for fault in [fault for fault in active if fault not in phase.faults]:
+                    self._switch_fault(fault, None)
+                    cleared.append((fault, started, sorted(phase.faults)))
+                for fault, intensity in phase.faults.items():
+                    if active.get(fault) != intensity:
+                        self._switch_fault(fault, intensity)
+                active = dict(phase.faults)
+
+                self._abort.wait(max(planned_end - time.monotonic(), 0))
+                windows.append((name, dict(phase.faults), started, time.monotonic(), phase.duration_seconds))
+                if self._abort.is_set():
+                    break
+            experiment["status"] = "aborted" if self._abort.is_set() else "completed"
+        except Exception as e:
+            logger.error(f"Experiment {experiment['id']} failed: {str(e)}")
+            experiment["status"] = "failed"
+            experiment["error"] = str(e)
+        finally:
+            for fault in active:
+                self._switch_fault(fault, None)
+            for fault, intensity in intensities.items():
+                chaos_state[fault]["intensity"] = intensity
+            chaos_stream.notify()
+            load.stop()
+            experiment["current_phase"] = None
+            experiment["finished_at"] = datetime.utcnow().isoformat()
+            experiment["report"] = build_report(load.snapshot(), windows, cleared)
+            experiment["report_file"] = _write_report(experiment)
+            logger.info(f"Experiment {experiment['id']} {experiment['status']}")
+
+def build_report(samples, windows, cleared) -> Dict[str, Any]:
+    """Per-phase metrics with deltas against the first fault-free phase, and recovery time per cleared fault"""
+    phases = []
+    baseline = None
+    for name, faults, start, end, planned_seconds in windows:
+        metrics = summarize(samples, start, end)
+        phase = {"name": name, "faults": faults, "duration_seconds": round(end - start, 1), **metrics}
+        if end - start > planned_seconds + PHASE_OVERRUN_TOLERANCE:
+            # Switching faults took longer than planned (e.g. a fault stalled the process)
+            phase["overrun_seconds"] = round(end - start - planned_seconds, 1)
+        if baseline is None and not faults:
+            baseline = metrics
+        phases.append(phase)
+    for phase in phases:
+        phase["delta"] = _deltas(phase, baseline) if baseline is not None else None
+
+    end = windows[-1][3] if windows else 0
+    recoveries = [
+        {
+            "fault": fault,
+            "recovery_seconds": recovery_seconds(samples, cleared_at, end, baseline) if baseline is not None else None,
+            # Recovery is judged against the baseline, so faults still active can hold it off
+            "other_faults_active": still_active,
+        }
+        for fault, cleared_at, still_active in cleared
+    ]
+    return {
+        "baseline_phase": next((phase["name"] for phase in phases if not phase["faults"]), None),
+        "phases": phases,
+        "recovery": recoveries,
+    }
+
+def _write_report(experiment: Dict[str, Any]) -> Optional[str]:
+    try:
+        os.makedirs(EXPERIMENT_REPORT_DIR, exist_ok=True)
+        path = os.path.join(EXPERIMENT_REPORT_DIR, f"{experiment['id']}.json")
+        with open(path, "w") as report_file:
+            json.dump(experiment, report_file, indent=2, default=str)
+        return path
+    except OSError as e:
+        logger.error(f"Could not write experiment report: {str(e)}")
+        return None
+
+# Per-worker runner
+experiment_runner = ExperimentRunner()
+
+# Create API router
+router = APIRouter(prefix="/admin/experiments", tags=["Chaos Engineering"])
+
+@router.post("", status_code=202)
+async def start_experiment(spec: ExperimentSpec):
+    """Start a chaos experiment (timeline of fault phases under built-in load)"""
+    experiment = experiment_runner.start(spec)
+    return {"id": experiment["id"], "status": experiment["status"]}
+
+@router.get("")
+async def list_experiments():
+    """List recent experiments, newest first"""
+    return [
+        {key: experiment.get(key) for key in ("id", "name", "status", "started_at", "finished_at", "current_phase")}
+        for experiment in reversed(list(experiment_runner.experiments.values()))
+    ]
+
+@router.get("/{experiment_id}")
+async def get_experiment(experiment_id: str):
+    """Get an experiment's progress, or its report once finished"""
+    experiment = experiment_runner.experiments.get(experiment_id)
+    if experiment is None:
+        raise HTTPException(status_code=404, detail=f"Experiment '{experiment_id}' not found")
+    return experiment
+
+@router.post("/{experiment_id}/abort")
+async def abort_experiment(experiment_id: str):
+    """Stop a running experiment early and clear its faults"""
+    experiment = experiment_runner.experiments.get(experiment_id)
+    if experiment is None:
+        raise HTTPException(status_code=404, detail=f"Experiment '{experiment_id}' not found")
+    if experiment["status"] == "running":
+        await experiment_runner.abort()
+    return {"id": experiment_id, "status": experiment["status"]}
@@ -4,60 +4,117 @@ Demonstrates: PostgreSQL connectivity, REST endpoints, Application Insights inte
 """
 
 import os
+import re
 import logging
 import time
 import random
-from typing import Optional, List
-from datetime import datetime
+import asyncio
+import threading
+from typing import Optional, List, Dict
+from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
+# Cold-start timing starts here, before the heavy framework imports
+_module_started = time.monotonic()
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, Response, Query, Header
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from opencensus.ext.azure.log_exporter import AzureLogHandler
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
 # Import chaos engineering module
-from chaos import router as chaos_router, chaos_state, apply_chaos_middleware
+from chaos import router as chaos_router, chaos_state, apply_chaos_middleware, record_request, chaos_stream, shutdown_chaos
+from changefeed import router as changefeed_router, change_feed
+from partitioning import router as partitioning_router, partition_maintenance, ITEMS_PARTITIONING
+from experiments import router as experiments_router, experiment_runner
+from db import router as db_router, DATABASE_URL, close_pool, current_request
+from querystats import router as querystats_router
+from prepared import router as prepared_router
+from dbfaults import current_route
+from storage import create_repository, PATCH_FIELDS, PreconditionFailed, InsufficientQuantity, ConcurrentUpdate, ValueOutOfRange, QUANTITY_MIN, QUANTITY_MAX
 
 # Configuration
 PORT = int(os.getenv("PORT", "8000"))
-DATABASE_URL = os.getenv("DATABASE_URL", "")
 APPLICATIONINSIGHTS_CONNECTION_STRING = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING", "")
 SLOW_MODE_DELAY = float(os.getenv("SLOW_MODE_DELAY", "0"))  # Seconds to delay each request (0 = disabled)
+MULTI_GET_MAX_IDS = int(os.getenv("MULTI_GET_MAX_IDS", "100"))  # Max ids per batch get request
+DRAIN_DELAY_SECONDS = float(os.getenv("DRAIN_DELAY_SECONDS", "5"))  # Keep serving after SIGTERM while readiness fails, so the ingress stops routing here
+DRAIN_TIMEOUT_SECONDS = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "25"))  # Deadline from SIGTERM for in-flight requests (keep under the platform's grace period)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Add Application Insights logging if connection string is provided
+# (the exporter is imported only when it is used - it is slow to import)
+telemetry_handler = None
 if APPLICATIONINSIGHTS_CONNECTION_STRING:
-    logger.addHandler(AzureLogHandler(connection_string=APPLICATIONINSIGHTS_CONNECTION_STRING))
+    from opencensus.ext.azure.log_exporter import AzureLogHandler
+    telemetry_handler = AzureLogHandler(connection_string=APPLICATIONINSIGHTS_CONNECTION_STRING)
+    logger.addHandler(telemetry_handler)
     logger.info("Application Insights logging enabled")
 
-# Database connection pool
-db_pool = None
+# Item storage backend (STORAGE_ENGINE=postgres|memory, see storage.py)
+repository = create_repository()
 
-def get_db_connection():
-    """Get a database connection from the pool"""
-    if not DATABASE_URL:
-        raise HTTPException(status_code=500, detail="Database connection not configured")
-    
+# Startup progress - /health/ready reports not-ready until warm-up finishes
+startup_state = {"ready": False, "phases": {}}
+
+# Shutdown progress - set by DrainingServer when SIGTERM arrives
+shutdown_state = {"draining": False, "accepting": True, "started": None}
+
+def record_startup_phase(name: str, started: float):
+    """Record how long a startup phase took, in milliseconds"""
+    startup_state["phases"][f"{name}_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+async def warm_up():
+    """Warm the connection pool and caches, then mark the service ready"""
+    started = time.monotonic()
     try:
-        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        
-        # Chaos: Connection leak simulation
-        if chaos_state["connection_leak"]["enabled"] and random.randint(1, 100) <= chaos_state["connection_leak"]["intensity"]:
-            # Silently leak the connection - store it so it's not garbage collected
-            chaos_state["connection_leak"]["leaked_connections"].append(conn)
-            # Return a new connection instead, leaking the previous one
-            conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-        
-        return conn
+        details = await run_in_threadpool(repository.warm)
+        logger.info(f"Warm-up complete: {details}")
     except Exception as e:
-        logger.error(f"Database connection error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
+        # Not fatal - readiness still checks storage on every probe
+        logger.error(f"Warm-up error: {str(e)}")
+    record_startup_phase("warm_up", started)
+    
+    import psutil
+    startup_state["phases"]["process_start_to_ready_ms"] = round(
+        (time.time() - psutil.Process().create_time()) * 1000, 1
+    )
+    startup_state["ready"] = True
+    logger.info(f"Startup complete: {startup_state['phases']}")
+
+# One entry of an If-Match list: *, "tag" or W/"tag"
+IF_MATCH_ENTRY = re.compile(r'\*|(W/)?"([^"]*)"')
+
+def item_etag(item: Dict) -> str:
+    """Strong ETag for an item version (updated_at changes on every write)"""
+    return f'"{item["updated_at"].isoformat()}"'
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """updated_at columns are naive UTC; convert timezone-aware client values to match"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def parse_if_match(value: str) -> Optional[List[datetime]]:
+    """The item versions an If-Match header accepts (None for '*', which only requires the item to exist)"""
+    versions = []
+    for match in IF_MATCH_ENTRY.finditer(value):
+        if match.group(0) == "*":
+            return None
+        if match.group(1):
+            # Weak tags never match If-Match
+            continue
+        try:
+            versions.append(naive_utc(datetime.fromisoformat(match.group(2))))
+        except ValueError:
+            # Not one of our ETags
+            continue
+    # An empty list matches nothing, so the write fails with 412
+    return versions
 
 def apply_slow_mode():
     """Apply artificial delay if SLOW_MODE_DELAY is set"""
@@ -74,40 +131,53 @@ async def lifespan(app: FastAPI):
     logger.info(f"Database configured: {bool(DATABASE_URL)}")
     logger.info(f"Application Insights configured: {bool(APPLICATIONINSIGHTS_CONNECTION_STRING)}")
     
-    # Initialize database schema
+    logger.info(f"Storage engine: {repository.name}")
+    record_startup_phase("module_load", _module_started)
+    
+    # Initialize database schema (a single version check unless a migration is pending)
+    started = time.monotonic()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Create items table if it doesn't exist
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS items (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                description TEXT,
-                price DECIMAL(10, 2),
-                quantity INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create an index on name for faster lookups
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_items_name ON items(name)
-        """)
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        logger.info("Database schema initialized successfully")
+        result = await run_in_threadpool(repository.init_schema)
+        logger.info(f"Database schema initialized successfully: {result}")
     except Exception as e:
         logger.error(f"Database initialization error: {str(e)}")
+    record_startup_phase("schema", started)
+    
+    # One LISTEN connection per worker feeds all change feed subscribers
+    # (the in-memory engine publishes its writes directly)
+    change_feed.start(asyncio.get_running_loop(), DATABASE_URL if repository.name == "postgres" else "")
+    
+    # Creates upcoming partitions and archives old items in the background
+    if ITEMS_PARTITIONING and repository.name == "postgres":
+        partition_maintenance.start(DATABASE_URL)
+    
+    # Start serving liveness immediately; readiness waits for warm-up
+    warm_up_task = asyncio.create_task(warm_up())
     
     yield
     
-    # Shutdown
+    # Shutdown - in-flight requests have already drained (see DrainingServer)
+    if shutdown_state["started"] is None:
+        # Not started by DrainingServer (e.g. `uvicorn main:app`): nothing was drained
+        shutdown_state.update(draining=True, accepting=False, started=time.monotonic())
     logger.info("Shutting down Workshop API...")
+    warm_up_task.cancel()
+    await experiment_runner.abort()
+    chaos_stream.close()
+    change_feed.stop()
+    
+    # Stop chaos threads and burner processes, then close every database
+    # connection (leaked ones are closed by shutdown_chaos) so no backends are orphaned
+    await run_in_threadpool(shutdown_chaos)
+    await run_in_threadpool(partition_maintenance.stop)
+    await run_in_threadpool(close_pool)
+    
+    drain_ms = round((time.monotonic() - shutdown_state["started"]) * 1000, 1)
+    logger.info(f"Shutdown complete: drained in {drain_ms} ms")
+    
+    # Export buffered log records before the process exits
+    if telemetry_handler is not None:
+        await run_in_threadpool(telemetry_handler.flush)
 
 # Create FastAPI app
 app = FastAPI(
@@ -120,6 +190,24 @@ app = FastAPI(
 # Include chaos engineering router
 app.include_router(chaos_router)
 
+# Include change feed router (registered before /api/items/{item_id})
+app.include_router(changefeed_router)
+
+# Include partition maintenance router
+app.include_router(partitioning_router)
+
+# Include chaos experiment runner router
+app.include_router(experiments_router)
+
+# Include connection checkout tracking router
+app.include_router(db_router)
+
+# Include query statistics router
+app.include_router(querystats_router)
+
+# Include prepared statements router
+app.include_router(prepared_router)
+
 # Note: Application Insights logging is enabled via AzureLogHandler
 # For request tracing, consider using OpenTelemetry in production
 
@@ -135,10 +223,44 @@ class ItemResponse(Item):
     created_at: datetime
     updated_at: datetime
 
+class ItemPatch(BaseModel):
+    """Only the fields present in the request are changed"""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    quantity: Optional[int] = None
+    quantity_delta: int = Field(0, ge=QUANTITY_MIN, le=QUANTITY_MAX)  # Added to the stored quantity atomically; decrements may not go below zero
+    updated_at: Optional[datetime] = None  # Apply only if the item is still at this version
+
+class BatchGetRequest(BaseModel):
+    ids: List[int]
+
+class BatchItemResult(BaseModel):
+    id: int
+    found: bool
+    item: Optional[ItemResponse] = None
+
+class BatchGetResponse(BaseModel):
+    items: List[BatchItemResult]
+    found: int
+    missing: int
+
+class ItemAggregates(BaseModel):
+    item_count: int
+    total_quantity: int
+    total_value: float
+    quantity_distribution: Dict[str, int]
+
 # Middleware to apply chaos engineering faults
 @app.middleware("http")
 async def chaos_middleware(request: Request, call_next):
     """Apply chaos faults to requests going to /api/* endpoints"""
+    # Lets the database-layer faults scope themselves by route
+    current_route.set(request.url.path)
+    # Connections checked out while serving this request become reclaimable once it finishes
+    finished = threading.Event()
+    current_request.set(finished)
+    
     # Only apply chaos to business API endpoints, not admin endpoints
     if request.url.path.startswith("/api/"):
         try:
@@ -146,7 +268,10 @@ async def chaos_middleware(request: Request, call_next):
         except HTTPException:
             raise
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        finished.set()
     
     # Chaos: Corrupt response data
     if chaos_state["corrupt_data"]["enabled"] and request.url.path.startswith("/api/"):
@@ -166,24 +291,56 @@ async def chaos_middleware(request: Request, call_next):
     
     return response
 
+# Registered after chaos_middleware so it wraps it and sees injected delays and errors
+@app.middleware("http")
+async def request_metrics_middleware(request: Request, call_next):
+    """Record request rate and latency of /api/* endpoints for the chaos dashboard"""
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        record_request((time.perf_counter() - started) * 1000)
+
+# Registered last so it is the outermost middleware
+@app.middleware("http")
+async def drain_middleware(request: Request, call_next):
+    """Turn away new work once draining has stopped accepting, and close keep-alive connections while draining"""
+    if not shutdown_state["accepting"] and not request.url.path.startswith("/health"):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is shutting down"},
+            headers={"Connection": "close", "Retry-After": "1"}
+        )
+    response = await call_next(request)
+    if shutdown_state["draining"]:
+        # Make keep-alive clients reconnect, landing on a replica that is staying up
+        response.headers["Connection"] = "close"
+    return response
+
 # Health check endpoints
+# Endpoints that touch storage are plain functions so FastAPI runs their
+# blocking calls in its threadpool instead of stalling the event loop.
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Basic health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
 @app.get("/health/ready", tags=["Health"])
-async def readiness_check():
-    """Readiness check - verifies database connectivity"""
+def readiness_check():
+    """Readiness check - verifies warm-up has finished and database connectivity"""
+    if shutdown_state["draining"]:
+        raise HTTPException(status_code=503, detail="Service not ready: draining")
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service not ready: warming up")
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
+        repository.ping()
         return {
             "status": "ready",
             "database": "connected",
+            "storage": repository.name,
+            "startup": startup_state["phases"],
             "timestamp": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -205,52 +362,86 @@ async def root():
         "endpoints": {
             "health": "/health",
             "items": "/api/items",
+            "aggregates": "/api/items/aggregates",
+            "changes": "/api/items/changes",
+            "batch": "/api/items/batch",
             "docs": "/docs",
             "chaos_dashboard": "/admin/chaos"
         }
     }
 
 @app.get("/api/items", response_model=List[ItemResponse], tags=["Items"])
-async def list_items(skip: int = 0, limit: int = 100):
+def list_items(skip: int = 0, limit: int = 100):
     """List all items with pagination"""
     apply_slow_mode()  # Apply artificial delay if SLOW_MODE is enabled
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            "SELECT * FROM items ORDER BY created_at DESC LIMIT %s OFFSET %s",
-            (limit, skip)
-        )
-        items = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
+        items = repository.list_items(skip, limit)
         logger.info(f"Retrieved {len(items)} items")
         return items
     except Exception as e:
         logger.error(f"Error listing items: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/items/aggregates", response_model=ItemAggregates, tags=["Items"])
+def get_item_aggregates():
+    """Get inventory totals and quantity distribution from the maintained summary"""
+    apply_slow_mode()  # Apply artificial delay if SLOW_MODE is enabled
+    try:
+        return repository.get_aggregates()
+    except Exception as e:
+        logger.error(f"Error reading item aggregates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def get_items_by_ids(ids: List[int]) -> dict:
+    """Resolve a list of ids with a single storage lookup, preserving input order"""
+    if not ids:
+        raise HTTPException(status_code=400, detail="At least one id is required")
+    if len(ids) > MULTI_GET_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MULTI_GET_MAX_IDS} ids per request")
+    
+    unique_ids = list(dict.fromkeys(ids))
+    try:
+        rows = repository.get_items(unique_ids)
+    except Exception as e:
+        logger.error(f"Error getting items {unique_ids}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    results = [
+        {"id": item_id, "found": item_id in rows, "item": rows.get(item_id)}
+        for item_id in ids
+    ]
+    found = sum(1 for result in results if result["found"])
+    logger.info(f"Retrieved {len(rows)} of {len(unique_ids)} requested items")
+    return {"items": results, "found": found, "missing": len(results) - found}
+
+@app.get("/api/items/batch", response_model=BatchGetResponse, tags=["Items"])
+def batch_get_items_query(ids: str = Query(..., description="Comma-separated item ids, e.g. 1,2,3")):
+    """Get several items by ID in one request (results follow input order)"""
+    apply_slow_mode()  # Apply artificial delay if SLOW_MODE is enabled
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    return get_items_by_ids(parsed)
+
+@app.post("/api/items/batch", response_model=BatchGetResponse, tags=["Items"])
+def batch_get_items(request: BatchGetRequest):
+    """Get several items by ID in one request (results follow input order)"""
+    apply_slow_mode()  # Apply artificial delay if SLOW_MODE is enabled
+    return get_items_by_ids(request.ids)
+
 @app.get("/api/items/{item_id}", response_model=ItemResponse, tags=["Items"])
-async def get_item(item_id: int):
+def get_item(item_id: int, response: Response):
     """Get a specific item by ID"""
     apply_slow_mode()  # Apply artificial delay if SLOW_MODE is enabled
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM items WHERE id = %s", (item_id,))
-        item = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
+        item = repository.get_item(item_id)
         
         if not item:
             raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
         
         logger.info(f"Retrieved item {item_id}")
+        response.headers["ETag"] = item_etag(item)
         return item
     except HTTPException:
         raise
@@ -259,60 +450,28 @@ async def get_item(item_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/items", response_model=ItemResponse, status_code=201, tags=["Items"])
-async def create_item(item: Item):
+def create_item(item: Item, response: Response):
     """Create a new item"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """
-            INSERT INTO items (name, description, price, quantity)
-            VALUES (%s, %s, %s, %s)
-            RETURNING *
-            """,
-            (item.name, item.description, item.price, item.quantity)
-        )
-        new_item = cursor.fetchone()
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
+        new_item = repository.create_item(item.model_dump())
         logger.info(f"Created item: {new_item['id']}")
+        response.headers["ETag"] = item_etag(new_item)
         return new_item
     except Exception as e:
         logger.error(f"Error creating item: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.put("/api/items/{item_id}", response_model=ItemResponse, tags=["Items"])
-async def update_item(item_id: int, item: Item):
+def update_item(item_id: int, item: Item, response: Response):
     """Update an existing item"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute(
-            """
-            UPDATE items
-            SET name = %s, description = %s, price = %s, quantity = %s,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = %s
-            RETURNING *
-            """,
-            (item.name, item.description, item.price, item.quantity, item_id)
-        )
-        updated_item = cursor.fetchone()
+        updated_item = repository.update_item(item_id, item.model_dump())
         
         if not updated_item:
-            conn.close()
             raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
         
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
         logger.info(f"Updated item: {item_id}")
+        response.headers["ETag"] = item_etag(updated_item)
         return updated_item
     except HTTPException:
         raise
@@ -320,23 +479,51 @@ async def update_item(item_id: int, item: Item):
         logger.error(f"Error updating item {item_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.delete("/api/items/{item_id}", status_code=204, tags=["Items"])
-async def delete_item(item_id: int):
-    """Delete an item"""
+@app.patch("/api/items/{item_id}", response_model=ItemResponse, tags=["Items"])
+def patch_item(item_id: int, patch: ItemPatch, response: Response, if_match: Optional[str] = Header(None)):
+    """Update only the given fields of an item in one statement (quantity_delta adjusts stock atomically)"""
+    fields = {field: getattr(patch, field) for field in PATCH_FIELDS if field in patch.model_fields_set}
+    for field in ("name", "quantity"):
+        if field in fields and fields[field] is None:
+            raise HTTPException(status_code=400, detail=f"{field} cannot be null")
+    if "quantity" in fields and patch.quantity_delta:
+        raise HTTPException(status_code=400, detail="Send either quantity or quantity_delta, not both")
+    if not fields and not patch.quantity_delta:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if if_match is not None and patch.updated_at is not None:
+        raise HTTPException(status_code=400, detail="Send either If-Match or updated_at, not both")
+    if if_match is not None:
+        expected_versions = parse_if_match(if_match)
+    else:
+        expected_versions = [naive_utc(patch.updated_at)] if patch.updated_at is not None else None
+    
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM items WHERE id = %s RETURNING id", (item_id,))
-        deleted = cursor.fetchone()
+        updated_item = repository.patch_item(item_id, fields, patch.quantity_delta, expected_versions)
         
-        if not deleted:
-            conn.close()
+        if not updated_item:
             raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        logger.info(f"Patched item: {item_id} ({', '.join(fields) or 'quantity_delta'})")
+        response.headers["ETag"] = item_etag(updated_item)
+        return updated_item
+    except HTTPException:
+        raise
+    except PreconditionFailed as e:
+        raise HTTPException(status_code=412, detail=str(e), headers={"ETag": item_etag(e.item)})
+    except (InsufficientQuantity, ConcurrentUpdate) as e:
+        raise HTTPException(status_code=409, detail=str(e), headers={"ETag": item_etag(e.item)})
+    except ValueOutOfRange as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error patching item {item_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/api/items/{item_id}", status_code=204, tags=["Items"])
+def delete_item(item_id: int):
+    """Delete an item"""
+    try:
+        if not repository.delete_item(item_id):
+            raise HTTPException(status_code=404, detail=f"Item {item_id} not found")
         
         logger.info(f"Deleted item: {item_id}")
         return None
@@ -346,7 +533,68 @@ async def delete_item(item_id: int):
         logger.error(f"Error deleting item {item_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Admin endpoints
+@app.post("/admin/aggregates/verify", tags=["Admin"])
+def verify_item_aggregates(repair: bool = False):
+    """Recompute the inventory summary from scratch and report drift (repair=true rewrites it)"""
+    try:
+        return repository.verify_aggregates(repair=repair)
+    except Exception as e:
+        logger.error(f"Error verifying item aggregates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Graceful shutdown
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that drains before exiting on SIGTERM/SIGINT:
+
+    1. readiness fails immediately while requests are still served for
+       DRAIN_DELAY_SECONDS, so the ingress stops routing new traffic here
+    2. new requests are turned away, open streams are ended and uvicorn waits
+       for in-flight requests until DRAIN_TIMEOUT_SECONDS after the signal
+    3. the lifespan shutdown stops chaos threads and closes connections
+
+    A second signal skips the rest of the delay and goes to step 2 on the next
+    tick; once step 2 has run, another signal forces an immediate exit.
+    """
+
+    def __init__(self, config: uvicorn.Config):
+        super().__init__(config)
+        self._drain_logged = False
+        self._skip_delay = False
+
+    def handle_exit(self, sig, frame):
+        if self.should_exit:
+            return super().handle_exit(sig, frame)
+        # Runs in a signal handler: only flip flags, on_tick does the rest
+        if shutdown_state["draining"]:
+            self._skip_delay = True
+            return
+        shutdown_state.update(draining=True, started=time.monotonic())
+        # Upper bound in case uvicorn starts shutting down before step 2 runs
+        self.config.timeout_graceful_shutdown = DRAIN_TIMEOUT_SECONDS
+
+    async def on_tick(self, counter: int) -> bool:
+        if shutdown_state["draining"] and not self.should_exit:
+            self._drain_tick()
+        return await super().on_tick(counter)
+
+    def _drain_tick(self):
+        elapsed = time.monotonic() - shutdown_state["started"]
+        if not self._drain_logged:
+            self._drain_logged = True
+            logger.info(f"Draining: readiness failing, {len(self.server_state.tasks)} request(s) in flight")
+        if elapsed < DRAIN_DELAY_SECONDS and not self._skip_delay:
+            return
+        shutdown_state["accepting"] = False
+        # Streams never finish on their own; clients reconnect to another replica
+        chaos_stream.close()
+        change_feed.close_subscribers()
+        logger.info(f"Draining: waiting for {len(self.server_state.tasks)} in-flight request(s)")
+        # uvicorn stops listening, then waits this long for in-flight requests
+        self.config.timeout_graceful_shutdown = max(DRAIN_TIMEOUT_SECONDS - elapsed, 0)
+        self.should_exit = True
+
 # Run the application
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=PORT)
+    DrainingServer(uvicorn.Config(app, host="0.0.0.0", port=PORT)).run()
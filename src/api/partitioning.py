@@ -0,0 +1,456 @@
+"""
+Items Partitioning Module
+Optional range partitioning of items by created_at, with throttled background archival of old rows
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extras import RealDictCursor
+from fastapi import APIRouter, HTTPException
+
+import aggregates
+import changefeed
+import schema
+from db import get_db_connection, release_db_connection
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+ITEMS_PARTITIONING = os.getenv("ITEMS_PARTITIONING", "false").lower() == "true"  # Convert items to a partitioned table on startup
+ITEMS_PARTITION_DAYS = int(os.getenv("ITEMS_PARTITION_DAYS", "1"))  # Width of each partition
+ITEMS_PARTITION_PREMAKE = int(os.getenv("ITEMS_PARTITION_PREMAKE", "7"))  # Future partitions kept ready
+ITEMS_RETENTION_DAYS = int(os.getenv("ITEMS_RETENTION_DAYS", "30"))  # Items older than this are archived (0 = keep forever)
+ITEMS_ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ITEMS_ARCHIVE_INTERVAL_SECONDS", "3600"))  # Time between maintenance runs
+ITEMS_ARCHIVE_BATCH_SIZE = int(os.getenv("ITEMS_ARCHIVE_BATCH_SIZE", "500"))  # Rows moved per transaction
+ITEMS_ARCHIVE_BATCH_PAUSE = float(os.getenv("ITEMS_ARCHIVE_BATCH_PAUSE", "0.5"))  # Minimum pause between batches
+
+ARCHIVE_SCHEMA = "items_archive"
+DEFAULT_PARTITION = "items_default"
+# Creating and detaching partitions need a brief exclusive lock on items; give
+# up quickly rather than queue foreground queries behind us, and try again next run
+ARCHIVE_LOCK_TIMEOUT = "500ms"
+# Batches pause at least this many times their own duration, so archival
+# keeps its share of the database below ~20% even when batches slow down
+ARCHIVE_THROTTLE_FACTOR = 4
+# Only one replica archives at a time
+ARCHIVE_LOCK_KEY = schema.MIGRATION_LOCK_KEY + 1
+
+EPOCH = datetime(1970, 1, 1)
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+def _interval_start(moment: datetime) -> datetime:
+    """Start of the partition containing moment (partitions are aligned to the epoch)"""
+    days = (moment - EPOCH).days
+    return EPOCH + timedelta(days=days - days % ITEMS_PARTITION_DAYS)
+
+def _partition_name(start: datetime) -> str:
+    return f"items_p{start:%Y%m%d}"
+
+def _db_now(cursor) -> datetime:
+    # created_at defaults to the database's local timestamp, so partition
+    # boundaries are computed from the database clock rather than ours
+    cursor.execute("SELECT LOCALTIMESTAMP AS now")
+    return cursor.fetchone()["now"]
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('items')")
+    row = cursor.fetchone()
+    return row is not None and row["relkind"] == "p"
+
+def list_partitions(cursor) -> List[Dict[str, Any]]:
+    """Attached partitions with their upper bound (None for the default partition) and estimated rows"""
+    cursor.execute("""
+        SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound,
+               GREATEST(c.reltuples, 0)::bigint AS estimated_rows
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'items'::regclass
+        ORDER BY c.relname
+    """)
+    partitions = []
+    for row in cursor.fetchall():
+        match = _UPPER_BOUND.search(row["bound"])
+        partitions.append({
+            "name": row["name"],
+            "upper_bound": datetime.fromisoformat(match.group(1)) if match else None,
+            "estimated_rows": row["estimated_rows"],
+        })
+    return partitions
+
+def _planned_partitions(now: datetime, first: Optional[datetime] = None) -> List[Tuple[str, datetime, datetime]]:
+    """Name and bounds of each partition from first (default: now) up to ITEMS_PARTITION_PREMAKE intervals ahead"""
+    start = _interval_start(first or now)
+    last = _interval_start(now) + timedelta(days=ITEMS_PARTITION_DAYS * ITEMS_PARTITION_PREMAKE)
+    planned = []
+    while start <= last:
+        end = start + timedelta(days=ITEMS_PARTITION_DAYS)
+        planned.append((_partition_name(start), start, end))
+        start = end
+    return planned
+
+def _needs_work(cursor) -> bool:
+    """Whether items still has to be converted or is missing upcoming partitions, in one query"""
+    cursor.execute("""
+        SELECT LOCALTIMESTAMP AS now,
+               (SELECT relkind FROM pg_class WHERE oid = to_regclass('items')) AS relkind,
+               ARRAY(
+                   SELECT c.relname::text
+                   FROM pg_inherits i
+                   JOIN pg_class c ON c.oid = i.inhrelid
+                   WHERE i.inhparent = to_regclass('items')
+               ) AS partitions
+    """)
+    row = cursor.fetchone()
+    if row["relkind"] != "p":
+        return True
+    existing = set(row["partitions"])
+    return any(name not in existing for name, _, _ in _planned_partitions(row["now"]))
+
+def create_partitions(cursor, first: Optional[datetime] = None, lock_timeout: Optional[str] = None) -> List[str]:
+    """
+    Create partitions from first (default: now) up to ITEMS_PARTITION_PREMAKE intervals ahead.
+    With lock_timeout, a partition whose lock on items isn't granted in time is
+    skipped and left for the next run.
+    """
+    if lock_timeout:
+        cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    existing = {partition["name"] for partition in list_partitions(cursor)}
+    created = []
+    for name, start, end in _planned_partitions(_db_now(cursor), first):
+        if name not in existing:
+            # A savepoint keeps one failure (e.g. matching rows already sitting
+            # in the default partition) from aborting the rest
+            cursor.execute("SAVEPOINT create_partition")
+            try:
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF items FOR VALUES FROM (%s) TO (%s)",
+                    (start, end)
+                )
+                cursor.execute("RELEASE SAVEPOINT create_partition")
+                created.append(name)
+            except psycopg2.errors.LockNotAvailable:
+                cursor.execute("ROLLBACK TO SAVEPOINT create_partition")
+                logger.info(f"Items table is busy, creating partition {name} next run")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT create_partition")
+                logger.warning(f"Could not create partition {name}: {str(e).strip()}")
+    return created
+
+def convert(cursor) -> int:
+    """Rebuild items as a table partitioned by created_at, keeping ids, rows and triggers"""
+    cursor.execute("LOCK TABLE items IN ACCESS EXCLUSIVE MODE")
+    cursor.execute("ALTER TABLE items RENAME TO items_unpartitioned")
+    cursor.execute("ALTER TABLE items_unpartitioned RENAME CONSTRAINT items_pkey TO items_unpartitioned_pkey")
+    # Keep the id sequence when the old table is dropped
+    cursor.execute("ALTER SEQUENCE items_id_seq OWNED BY NONE")
+
+    # The partition key has to be part of the primary key; ids stay unique
+    # because they still come from items_id_seq
+    cursor.execute("""
+        CREATE TABLE items (
+            id INTEGER NOT NULL DEFAULT nextval('items_id_seq'),
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            price DECIMAL(10, 2),
+            quantity INTEGER DEFAULT 0,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF items DEFAULT")
+
+    # Partitions cover the retention window; older rows land in the default
+    # partition and are archived in batches by the maintenance job
+    now = _db_now(cursor)
+    create_partitions(cursor, first=now - timedelta(days=ITEMS_RETENTION_DAYS) if ITEMS_RETENTION_DAYS else now)
+
+    cursor.execute("""
+        INSERT INTO items (id, name, description, price, quantity, created_at, updated_at)
+        SELECT id, name, description, price, quantity,
+               COALESCE(created_at, updated_at, CURRENT_TIMESTAMP), updated_at
+        FROM items_unpartitioned
+    """)
+    copied = cursor.rowcount
+    cursor.execute("DROP TABLE items_unpartitioned")
+    cursor.execute("ALTER SEQUENCE items_id_seq OWNED BY items.id")
+
+    cursor.execute("CREATE INDEX idx_items_name ON items (name)")
+    cursor.execute("CREATE INDEX idx_items_created_at ON items (created_at)")
+    # Triggers went with the old table. The copy bypassed them, which is
+    # right: the rows (and so the inventory summary) are unchanged
+    aggregates.init_schema(cursor)
+    changefeed.init_schema(cursor)
+    return copied
+
+def ensure(database_url: str) -> Dict[str, Any]:
+    """Convert items to a partitioned table if needed and make sure future partitions exist"""
+    start = time.monotonic()
+    conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        # Fast path: once partitioned and premade, replicas don't queue on the lock
+        if not _needs_work(cursor):
+            return {"converted_rows": None, "created": [], "duration_ms": round((time.monotonic() - start) * 1000, 1)}
+
+        cursor.execute("SELECT pg_advisory_lock(%s)", (schema.MIGRATION_LOCK_KEY,))
+        try:
+            conn.autocommit = False
+            # Another replica may have converted items while we waited for the lock
+            converted_rows = None
+            if not is_partitioned(cursor):
+                logger.info("Converting items to a partitioned table")
+                converted_rows = convert(cursor)
+            # Creating a partition locks items and scans the default partition
+            created = create_partitions(cursor, lock_timeout=ARCHIVE_LOCK_TIMEOUT)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (schema.MIGRATION_LOCK_KEY,))
+        result = {"converted_rows": converted_rows, "created": created}
+        if converted_rows is not None:
+            logger.info(f"Items table partitioned: {converted_rows} rows copied")
+        result["duration_ms"] = round((time.monotonic() - start) * 1000, 1)
+        return result
+    finally:
+        conn.close()
+
+def _detach_expired(conn, cutoff: datetime, stop: threading.Event) -> List[str]:
+    """Detach partitions that end before cutoff and move them to the archive schema"""
+    cursor = conn.cursor()
+    detached = []
+    try:
+        expired = [
+            partition for partition in list_partitions(cursor)
+            if partition["upper_bound"] is not None and partition["upper_bound"] <= cutoff
+        ]
+        conn.commit()
+        for partition in expired:
+            if stop.is_set():
+                break
+            name = partition["name"]
+            try:
+                cursor.execute(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'")
+                cursor.execute(f"ALTER TABLE items DETACH PARTITION {name}")
+                # Detaching bypasses the row triggers: take the partition's
+                # rows out of the inventory summary in the same transaction
+                cursor.execute(f"""
+                    SELECT items_summary_apply(
+                        shard, -item_count::integer, -total_quantity::bigint, -total_value, bucket)
+                    FROM (
+                        SELECT (id % {aggregates.SUMMARY_SHARDS})::smallint AS shard,
+                               items_quantity_bucket(quantity) AS bucket,
+                               COUNT(*) AS item_count,
+                               COALESCE(SUM(quantity), 0) AS total_quantity,
+                               COALESCE(SUM(COALESCE(price, 0) * COALESCE(quantity, 0)), 0) AS total_value
+                        FROM {name}
+                        GROUP BY 1, 2
+                    ) totals
+                """)
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+                # One event for the whole partition instead of a delete per row
+                cursor.execute(
+                    "SELECT pg_notify(%s, json_build_object("
+                    "'seq', nextval('items_change_seq'), 'op', 'archive', 'before', %s::timestamp)::text)",
+                    (changefeed.CHANGE_FEED_CHANNEL, partition["upper_bound"])
+                )
+                conn.commit()
+                detached.append(name)
+                logger.info(f"Archived partition {name} ({partition['estimated_rows']} rows)")
+            except psycopg2.errors.LockNotAvailable:
+                conn.rollback()
+                logger.info(f"Partition {name} is busy, archiving it next run")
+            except psycopg2.Error as e:
+                # E.g. a table of that name already in the archive schema; keep
+                # archiving the rest rather than failing every run on this one
+                conn.rollback()
+                logger.warning(f"Could not archive partition {name}: {str(e).strip()}")
+    finally:
+        cursor.close()
+    return detached
+
+def _move_default_rows(conn, cutoff: datetime, stop: threading.Event) -> int:
+    """Move rows older than cutoff out of the default partition, one small throttled batch at a time"""
+    cursor = conn.cursor()
+    moved = 0
+    try:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{DEFAULT_PARTITION} (LIKE items)"
+        )
+        conn.commit()
+        while not stop.is_set():
+            started = time.monotonic()
+            cursor.execute(f"SET LOCAL lock_timeout = '{ARCHIVE_LOCK_TIMEOUT}'")
+            # Deleting through the partition fires the row triggers, so the
+            # summary and change feed stay in step with each batch
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {DEFAULT_PARTITION}
+                    WHERE ctid IN (
+                        SELECT ctid FROM {DEFAULT_PARTITION}
+                        WHERE created_at < %s
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING *
+                )
+                INSERT INTO {ARCHIVE_SCHEMA}.{DEFAULT_PARTITION} SELECT * FROM moved
+                """,
+                (cutoff, ITEMS_ARCHIVE_BATCH_SIZE)
+            )
+            count = cursor.rowcount
+            conn.commit()
+            moved += count
+            if count < ITEMS_ARCHIVE_BATCH_SIZE:
+                break
+            stop.wait(max(ITEMS_ARCHIVE_BATCH_PAUSE, ARCHIVE_THROTTLE_FACTOR * (time.monotonic() - started)))
+    except psycopg2.errors.LockNotAvailable:
+        conn.rollback()
+        logger.info("Default partition is busy, moving the remaining rows next run")
+    finally:
+        cursor.close()
+    return moved
+
+class PartitionMaintenance:
+    """
+    Background job that keeps future partitions created and archives rows
+    older than ITEMS_RETENTION_DAYS.
+
+    Whole partitions past the retention window are detached and moved to the
+    items_archive schema, which is a catalog change rather than a row copy.
+    Old rows in the default partition (data from before partitioning was
+    enabled) are moved in small batches with a pause between them. The job
+    uses its own connection, so it never takes a pooled connection from a
+    request.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._database_url = ""
+        self.stats: Dict[str, Any] = {"runs": 0, "last_run": None, "last_error": None}
+
+    def start(self, database_url: str) -> None:
+        """Start the maintenance thread for this worker"""
+        self._database_url = database_url
+        if database_url and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread, finishing the batch in progress"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self) -> None:
+        # First run shortly after startup, once warm-up traffic has settled
+        delay = min(60.0, ITEMS_ARCHIVE_INTERVAL_SECONDS)
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Partition maintenance error: {str(e)}")
+            delay = ITEMS_ARCHIVE_INTERVAL_SECONDS
+
+    def run_once(self) -> Dict[str, Any]:
+        """Create upcoming partitions and archive expired rows; skipped if another replica is running it"""
+        with self._run_lock:
+            started = time.monotonic()
+            conn = psycopg2.connect(self._database_url, cursor_factory=RealDictCursor)
+            try:
+                conn.autocommit = True
+                cursor = conn.cursor()
+                cursor.execute("SELECT pg_try_advisory_lock(%s) AS locked", (ARCHIVE_LOCK_KEY,))
+                if not cursor.fetchone()["locked"]:
+                    return {"skipped": "running on another replica"}
+                try:
+                    conn.autocommit = False
+                    created = create_partitions(cursor, lock_timeout=ARCHIVE_LOCK_TIMEOUT)
+                    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+                    conn.commit()
+
+                    detached: List[str] = []
+                    moved = 0
+                    if ITEMS_RETENTION_DAYS > 0:
+                        cutoff = _db_now(cursor) - timedelta(days=ITEMS_RETENTION_DAYS)
+                        conn.commit()
+                        detached = _detach_expired(conn, cutoff, self._stop)
+                        moved = _move_default_rows(conn, cutoff, self._stop)
+                except Exception as e:
+                    conn.rollback()
+                    self.stats["last_error"] = str(e)
+                    raise
+                finally:
+                    conn.autocommit = True
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (ARCHIVE_LOCK_KEY,))
+            finally:
+                conn.close()
+
+            result = {
+                "created_partitions": created,
+                "archived_partitions": detached,
+                "archived_rows_moved": moved,
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+                "finished_at": datetime.utcnow().isoformat(),
+            }
+            self.stats["runs"] += 1
+            self.stats["last_run"] = result
+            self.stats["last_error"] = None
+            if created or detached or moved:
+                logger.info(f"Partition maintenance: {result}")
+            return result
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": ITEMS_PARTITIONING,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "retention_days": ITEMS_RETENTION_DAYS,
+            "partition_days": ITEMS_PARTITION_DAYS,
+            **self.stats,
+        }
+
+# Per-worker maintenance job
+partition_maintenance = PartitionMaintenance()
+
+# Create API router
+router = APIRouter(prefix="/admin/partitions", tags=["Admin"])
+
+@router.get("/status")
+def get_partition_status():
+    """Get partitions, their estimated sizes and the last maintenance run"""
+    status = partition_maintenance.status()
+    if not status["running"]:
+        return status
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        status["partitions"] = list_partitions(cursor)
+        cursor.close()
+    finally:
+        release_db_connection(conn)
+    return status
+
+@router.post("/maintain")
+def run_partition_maintenance():
+    """Create upcoming partitions and archive expired rows now"""
+    if not partition_maintenance.status()["running"]:
+        raise HTTPException(status_code=409, detail="Partitioning is not enabled (set ITEMS_PARTITIONING=true)")
+    return partition_maintenance.run_once()
@@ -0,0 +1,165 @@
+"""
+Prepared Statements Module
+Server-side prepared statements for the hot item queries, cached per connection
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Any, Sequence
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+from fastapi import APIRouter
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+PREPARED_STATEMENTS = os.getenv("PREPARED_STATEMENTS", "true").lower() == "true"  # Prepare hot queries once per connection
+
+# Runtime state (the enabled flag can be flipped at /admin/db/prepared-statements)
+prepared_state = {
+    "enabled": PREPARED_STATEMENTS,
+    # Bumped to make every connection drop its prepared statements before its next query
+    "epoch": 0,
+}
+_counters = {"prepares": 0, "executions": 0, "text_executions": 0, "replans": 0, "invalidations": 0}
+_counters_lock = threading.Lock()
+
+# Every Statement, by name
+statements: Dict[str, "Statement"] = {}
+
+def _count(counter: str) -> None:
+    with _counters_lock:
+        _counters[counter] += 1
+
+class Statement:
+    """
+    A fixed query written with %s placeholders, like any other psycopg2 query.
+    It is prepared on the server as PREPARE name AS ... $1, $2 and then run
+    with EXECUTE name (%s, %s), so only the parameters are sent per call.
+    """
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = " ".join(sql.split())
+        parts = self.sql.split("%s")
+        self.prepare_sql = f"PREPARE {name} AS " + parts[0] + "".join(
+            f"${number}{part}" for number, part in enumerate(parts[1:], 1)
+        )
+        placeholders = ", ".join(["%s"] * (len(parts) - 1))
+        self.execute_sql = f"EXECUTE {name} ({placeholders})" if placeholders else f"EXECUTE {name}"
+        statements[name] = self
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements are prepared in its server session"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A new connection is a new server session - nothing is prepared yet,
+        # which is all the invalidation a reconnect needs
+        self.prepared = set()
+        self.prepared_epoch = prepared_state["epoch"]
+
+def _ensure_prepared(cursor, statement: Statement) -> None:
+    conn = cursor.connection
+    if conn.prepared_epoch != prepared_state["epoch"]:
+        cursor.execute("DEALLOCATE ALL")
+        conn.prepared.clear()
+        conn.prepared_epoch = prepared_state["epoch"]
+        _count("invalidations")
+    if statement.name not in conn.prepared:
+        # Prepared statements belong to the session, not the transaction, so
+        # they survive a rollback of the transaction that created them
+        cursor.execute(statement.prepare_sql)
+        conn.prepared.add(statement.name)
+        _count("prepares")
+
+def execute(cursor, statement: Statement, params: Sequence[Any] = ()) -> None:
+    """Run a statement, preparing it on this connection first if needed; falls back to plain text when disabled"""
+    conn = cursor.connection
+    if not prepared_state["enabled"] or not isinstance(conn, PreparingConnection):
+        cursor.execute(statement.sql, params)
+        _count("text_executions")
+        return
+
+    first_in_transaction = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    _ensure_prepared(cursor, statement)
+    try:
+        cursor.execute(statement.execute_sql, params)
+        _count("executions")
+    except psycopg2.errors.FeatureNotSupported as e:
+        # The table changed shape since PREPARE (SELECT * now returns different
+        # columns). Postgres replans on its own for everything else, but this
+        # statement is stuck until it is prepared again.
+        if "cached plan must not change result type" not in str(e):
+            raise
+        if not first_in_transaction:
+            # Retrying would roll back the caller's earlier statements, so let
+            # it fail; this connection starts over on its next query
+            conn.prepared_epoch = -1
+            raise
+        logger.info(f"Re-preparing {statement.name} after a schema change")
+        conn.rollback()
+        cursor.execute(f"DEALLOCATE {statement.name}")
+        conn.prepared.discard(statement.name)
+        _ensure_prepared(cursor, statement)
+        cursor.execute(statement.execute_sql, params)
+        _count("replans")
+
+def prepare_all(conn) -> int:
+    """Prepare every statement on a connection (used when warming the pool)"""
+    if not prepared_state["enabled"] or not isinstance(conn, PreparingConnection):
+        return 0
+    cursor = conn.cursor()
+    try:
+        for statement in statements.values():
+            _ensure_prepared(cursor, statement)
+    finally:
+        cursor.close()
+    return len(conn.prepared)
+
+def prepare_for(cursor, sql: str) -> None:
+    """Prepare the statement an 'EXECUTE name (...)' string refers to, so it can be run on another connection"""
+    words = sql.split(None, 2)
+    if len(words) >= 2 and words[0].upper() == "EXECUTE":
+        statement = statements.get(words[1])
+        if statement is not None and isinstance(cursor.connection, PreparingConnection):
+            _ensure_prepared(cursor, statement)
+
+def invalidate_all() -> None:
+    """Make every connection drop and re-prepare its statements before its next query"""
+    prepared_state["epoch"] += 1
+
+def prepared_status() -> Dict[str, Any]:
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        "enabled": prepared_state["enabled"],
+        "epoch": prepared_state["epoch"],
+        "statements": {name: statement.sql for name, statement in statements.items()},
+        **counters,
+    }
+
+# Create API router
+router = APIRouter(prefix="/admin/db", tags=["Admin"])
+
+@router.get("/prepared-statements")
+async def get_prepared_statements():
+    """Get the prepared statements and how often they were prepared, executed and invalidated"""
+    return prepared_status()
+
+@router.post("/prepared-statements")
+async def set_prepared_statements(enabled: bool):
+    """Turn prepared statements on or off at runtime (off runs the same queries as plain text)"""
+    prepared_state["enabled"] = enabled
+    logger.info(f"Prepared statements {'enabled' if enabled else 'disabled'}")
+    return prepared_status()
+
+@router.post("/prepared-statements/invalidate")
+async def invalidate_prepared_statements():
+    """Drop and re-prepare the statements on every connection (run after changing the schema by hand)"""
+    invalidate_all()
+    logger.info(f"Prepared statements invalidated (epoch {prepared_state['epoch']})")
+    return prepared_status()
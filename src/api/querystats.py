@@ -0,0 +1,220 @@
+"""
+Query Statistics Module
+Per-statement timing keyed by normalized SQL, with sampled EXPLAIN ANALYZE plans of slow executions
+"""
+
+import os
+import re
+import time
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from fastapi import APIRouter, HTTPException
+
+import prepared
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))  # Executions slower than this are candidates for plan capture (0 = off)
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "0.1"))  # Fraction of slow executions whose plan is captured
+SLOW_QUERY_PLAN_INTERVAL = float(os.getenv("SLOW_QUERY_PLAN_INTERVAL", "60"))  # Min seconds between plans of the same statement
+QUERY_STATS_MAX_STATEMENTS = 500  # Distinct statements tracked; the rest are counted under "<other>"
+QUERY_STATS_SAMPLES = 1024  # Recent durations kept per statement for percentiles
+PLANS_PER_STATEMENT = 3  # Most recent plans kept per statement
+EXPLAIN_QUEUE_SIZE = 16  # Pending plan captures; more are dropped
+# The plan is captured by re-running the statement inside a transaction that
+# is rolled back. Writes take row locks, so never wait for foreground traffic.
+EXPLAIN_LOCK_TIMEOUT = "100ms"
+EXPLAIN_STATEMENT_TIMEOUT = "10s"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+
+_normalized_cache: Dict[str, str] = {}
+
+def normalize(query) -> str:
+    """Collapse whitespace and replace literals with ? so executions of the same statement share stats"""
+    if isinstance(query, bytes):
+        query = query.decode(errors="ignore")
+    normalized = _normalized_cache.get(query)
+    if normalized is None:
+        normalized = " ".join(query.split())
+        normalized = _NUMBER_LITERAL.sub("?", _STRING_LITERAL.sub("?", normalized))
+        if len(_normalized_cache) < QUERY_STATS_MAX_STATEMENTS * 2:
+            _normalized_cache[query] = normalized
+    return normalized
+
+class _StatementStats:
+    __slots__ = ("calls", "total_ms", "max_ms", "rows", "slow_calls", "durations", "plans", "last_plan_at")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.slow_calls = 0
+        self.durations: deque = deque(maxlen=QUERY_STATS_SAMPLES)
+        self.plans: deque = deque(maxlen=PLANS_PER_STATEMENT)
+        self.last_plan_at = 0.0
+
+class QueryStats:
+    """
+    Statement statistics for this worker. Recording is a dict lookup and a few
+    additions under a lock. Plans are captured on a separate thread with its
+    own connection, so a slow query never waits for its own EXPLAIN.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._statements: Dict[str, _StatementStats] = {}
+        self._explain_queue: queue.Queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._explainer: Optional[threading.Thread] = None
+        self.database_url = os.getenv("DATABASE_URL", "")
+        self.since = datetime.utcnow()
+        self.plans_dropped = 0
+
+    def record(self, cursor, query, params, duration_ms: float) -> None:
+        key = normalize(query)
+        capture = False
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= QUERY_STATS_MAX_STATEMENTS:
+                    key = "<other>"
+                stats = self._statements.setdefault(key, _StatementStats())
+            stats.calls += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.rows += max(cursor.rowcount, 0)
+            stats.durations.append(duration_ms)
+            if SLOW_QUERY_MS > 0 and duration_ms >= SLOW_QUERY_MS:
+                stats.slow_calls += 1
+                now = time.monotonic()
+                if (now - stats.last_plan_at >= SLOW_QUERY_PLAN_INTERVAL
+                        and random.random() < SLOW_QUERY_SAMPLE_RATE):
+                    stats.last_plan_at = now
+                    capture = True
+        if capture:
+            self._request_plan(cursor, key, query, params, duration_ms)
+
+    def _request_plan(self, cursor, key: str, query, params, duration_ms: float) -> None:
+        try:
+            # Bind the parameters now, while the cursor is still ours
+            sql = cursor.mogrify(query, params).decode()
+            self._explain_queue.put_nowait((key, sql, duration_ms))
+        except queue.Full:
+            self.plans_dropped += 1
+            return
+        except Exception as e:
+            logger.debug(f"Could not queue plan capture: {str(e)}")
+            return
+        if self._explainer is None or not self._explainer.is_alive():
+            self._explainer = threading.Thread(target=self._explain_worker, daemon=True)
+            self._explainer.start()
+
+    def _explain_worker(self) -> None:
+        conn = None
+        while True:
+            key, sql, duration_ms = self._explain_queue.get()
+            try:
+                if conn is None or conn.closed:
+                    conn = psycopg2.connect(
+                        self.database_url,
+                        connection_factory=prepared.PreparingConnection, cursor_factory=RealDictCursor
+                    )
+                cursor = conn.cursor()
+                try:
+                    # EXECUTE of a prepared statement needs it prepared on this connection too
+                    prepared.prepare_for(cursor, sql)
+                    cursor.execute(f"SET LOCAL lock_timeout = '{EXPLAIN_LOCK_TIMEOUT}'")
+                    cursor.execute(f"SET LOCAL statement_timeout = '{EXPLAIN_STATEMENT_TIMEOUT}'")
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql)
+                    plan = [row["QUERY PLAN"] for row in cursor.fetchall()]
+                finally:
+                    cursor.close()
+                    # ANALYZE really runs the statement - never keep its effects
+                    conn.rollback()
+            except Exception as e:
+                plan = [f"Plan capture failed: {str(e).strip()}"]
+                if conn is not None and conn.closed:
+                    conn = None
+            with self._lock:
+                stats = self._statements.get(key)
+                if stats is not None:
+                    stats.plans.append({
+                        "captured_at": datetime.utcnow().isoformat(),
+                        "execution_ms": round(duration_ms, 1),
+                        "sql": sql,
+                        "plan": plan,
+                    })
+
+    def snapshot(self, sort: str = "total_ms", limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            statements = []
+            for key, stats in self._statements.items():
+                durations = sorted(stats.durations)
+                statements.append({
+                    "query": key,
+                    "calls": stats.calls,
+                    "total_ms": round(stats.total_ms, 1),
+                    "mean_ms": round(stats.total_ms / stats.calls, 2),
+                    "p99_ms": round(durations[min(len(durations) - 1, int(len(durations) * 0.99))], 2),
+                    "max_ms": round(stats.max_ms, 1),
+                    "rows": stats.rows,
+                    "rows_per_call": round(stats.rows / stats.calls, 1),
+                    "slow_calls": stats.slow_calls,
+                    "plans": list(stats.plans),
+                })
+        statements.sort(key=lambda statement: statement[sort], reverse=True)
+        return {
+            "since": self.since.isoformat(),
+            "slow_query_ms": SLOW_QUERY_MS,
+            "sample_rate": SLOW_QUERY_SAMPLE_RATE,
+            "plans_dropped": self.plans_dropped,
+            "statements": statements[:limit],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self.since = datetime.utcnow()
+            self.plans_dropped = 0
+
+# Per-worker statement statistics
+query_stats = QueryStats()
+
+class InstrumentedCursor(RealDictCursor):
+    """RealDictCursor that records each statement's duration and row count"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            query_stats.record(self, query, vars, (time.perf_counter() - started) * 1000)
+
+# Create API router
+router = APIRouter(prefix="/admin/queries", tags=["Admin"])
+
+SORT_FIELDS = ("total_ms", "mean_ms", "p99_ms", "max_ms", "calls", "rows", "slow_calls")
+
+@router.get("")
+async def get_query_stats(sort: str = "total_ms", limit: int = 20):
+    """Get per-statement call count, timing and rows, with captured plans of slow executions"""
+    if sort not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field '{sort}' (expected one of {', '.join(SORT_FIELDS)})")
+    return query_stats.snapshot(sort=sort, limit=limit)
+
+@router.post("/reset")
+async def reset_query_stats():
+    """Clear all statement statistics and plans"""
+    query_stats.reset()
+    return {"status": "reset"}
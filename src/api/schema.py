@@ -0,0 +1,106 @@
+"""
+Database Schema Module
+Versioned schema migrations, applied once per version under an advisory lock
+"""
+
+import logging
+import time
+from typing import Callable, List, Tuple, Dict, Any
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+import aggregates
+import changefeed
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_advisory_lock, so replicas starting
+# together apply migrations one at a time instead of racing on DDL.
+MIGRATION_LOCK_KEY = 7_340_021
+
+def _create_items(cursor) -> None:
+    # Create items table if it doesn't exist
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS items (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            price DECIMAL(10, 2),
+            quantity INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create an index on name for faster lookups
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_items_name ON items(name)
+    """)
+
+# (version, description, apply). Migrations must stay idempotent: databases
+# created before versioning already have some of these objects.
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "items table", _create_items),
+    (2, "inventory summary triggers", aggregates.init_schema),
+    (3, "change feed notification trigger", changefeed.init_schema),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def _current_version(cursor) -> int:
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+    if not cursor.fetchone()["present"]:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    return cursor.fetchone()["version"]
+
+def migrate(database_url: str) -> Dict[str, Any]:
+    """Bring the schema up to SCHEMA_VERSION; a no-op (one query) when already current"""
+    start = time.monotonic()
+    conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor)
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+
+        # Fast path: every replica after the first only pays for this query
+        version = _current_version(cursor)
+        if version >= SCHEMA_VERSION:
+            return {"version": version, "applied": [], "duration_ms": round((time.monotonic() - start) * 1000, 1)}
+
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        applied = []
+        try:
+            # Another replica may have migrated while we waited for the lock
+            version = _current_version(cursor)
+            conn.autocommit = False
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+            for migration_version, description, apply in MIGRATIONS:
+                if migration_version <= version:
+                    continue
+                logger.info(f"Applying schema migration {migration_version}: {description}")
+                apply(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (migration_version, description)
+                )
+                conn.commit()
+                applied.append(migration_version)
+                version = migration_version
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.autocommit = True
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+
+        return {"version": version, "applied": applied, "duration_ms": round((time.monotonic() - start) * 1000, 1)}
+    finally:
+        conn.close()
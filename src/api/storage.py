@@ -0,0 +1,482 @@
+"""
+Storage Backend Module
+Item repository interface with PostgreSQL and in-memory implementations
+"""
+
+import os
+import bisect
+import logging
+import itertools
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Callable
+
+import psycopg2
+import psycopg2.errors
+
+import aggregates
+import changefeed
+import partitioning
+import prepared
+import schema
+from db import DATABASE_URL, get_db_connection, release_db_connection, warm_pool
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+STORAGE_ENGINE = os.getenv("STORAGE_ENGINE", "postgres")  # postgres | memory
+
+# Hot item queries, prepared once per pooled connection
+ITEM_LIST = prepared.Statement("items_list", "SELECT * FROM items ORDER BY created_at DESC LIMIT %s OFFSET %s")
+ITEM_GET = prepared.Statement("items_get", "SELECT * FROM items WHERE id = %s")
+ITEM_INSERT = prepared.Statement("items_insert", """
+    INSERT INTO items (name, description, price, quantity)
+    VALUES (%s, %s, %s, %s)
+    RETURNING *
+""")
+ITEM_UPDATE = prepared.Statement("items_update", """
+    UPDATE items
+    SET name = %s, description = %s, price = %s, quantity = %s,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+    RETURNING *
+""")
+# Sets only the columns whose flag is true and adds the quantity delta (a NULL
+# quantity counts as 0 only when there is one), guarded by the optional
+# updated_at precondition (any of the given versions) and, for decrements, a
+# non-negative result - one statement and one plan for every combination of fields
+ITEM_PATCH = prepared.Statement("items_patch", """
+    UPDATE items
+    SET name = CASE WHEN %s THEN %s ELSE name END,
+        description = CASE WHEN %s THEN %s ELSE description END,
+        price = CASE WHEN %s THEN %s ELSE price END,
+        quantity = COALESCE(CASE WHEN %s THEN %s ELSE quantity END, CASE WHEN %s <> 0 THEN 0 END) + %s,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s
+      AND (%s::timestamp[] IS NULL OR updated_at = ANY(%s))
+      AND (%s >= 0 OR COALESCE(CASE WHEN %s THEN %s ELSE quantity END, 0) + %s >= 0)
+    RETURNING *
+""")
+ITEM_DELETE = prepared.Statement("items_delete", "DELETE FROM items WHERE id = %s RETURNING id")
+
+PATCH_FIELDS = ("name", "description", "price", "quantity")
+PATCH_ATTEMPTS = 3  # Conditional UPDATEs tried while concurrent writes keep changing the outcome
+QUANTITY_MIN, QUANTITY_MAX = -2**31, 2**31 - 1  # Range of the INTEGER quantity column
+
+class PreconditionFailed(Exception):
+    """The item changed since the version the caller based its write on"""
+
+    def __init__(self, item: Dict[str, Any]):
+        super().__init__(f"Item {item['id']} was modified at {item['updated_at'].isoformat()}")
+        self.item = item
+
+class InsufficientQuantity(Exception):
+    """A quantity decrement would take the item below zero"""
+
+    def __init__(self, item: Dict[str, Any], quantity_delta: int):
+        super().__init__(f"Item {item['id']} has quantity {item['quantity']}, cannot apply {quantity_delta}")
+        self.item = item
+
+class ValueOutOfRange(Exception):
+    """A patched value doesn't fit its column (e.g. a quantity_delta overflowing quantity)"""
+
+    def __init__(self, item_id: int, reason: str):
+        super().__init__(f"Item {item_id}: {reason}")
+
+class ConcurrentUpdate(Exception):
+    """Concurrent writes kept changing the item while a patch was being applied"""
+
+    def __init__(self, item: Dict[str, Any]):
+        super().__init__(f"Item {item['id']} is being modified concurrently, retry")
+        self.item = item
+
+class ItemRepository(ABC):
+    """
+    Storage operations used by the items API. Rows are plain dicts with the
+    columns of the items table (id, name, description, price, quantity,
+    created_at, updated_at).
+    """
+
+    name: str = ""
+
+    def init_schema(self) -> Dict[str, Any]:
+        """Prepare the backing store (no-op unless the engine needs it)"""
+        return {}
+
+    def warm(self) -> Dict[str, Any]:
+        """Pre-open connections and prime caches before reporting ready"""
+        return {}
+
+    @abstractmethod
+    def ping(self) -> None:
+        """Raise if the backing store is unavailable"""
+
+    @abstractmethod
+    def list_items(self, skip: int, limit: int) -> List[Dict[str, Any]]:
+        """Items ordered newest first"""
+
+    @abstractmethod
+    def get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        """A single item, or None"""
+
+    @abstractmethod
+    def get_items(self, item_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Items for the given ids keyed by id; missing ids are absent"""
+
+    @abstractmethod
+    def create_item(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert an item and return the stored row"""
+
+    @abstractmethod
+    def update_item(self, item_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Overwrite an item and return the stored row, or None if it doesn't exist"""
+
+    @abstractmethod
+    def patch_item(self, item_id: int, fields: Dict[str, Any], quantity_delta: int = 0,
+                   expected_versions: Optional[List[datetime]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Set only the given fields and add quantity_delta to quantity in one
+        atomic write, and return the stored row, or None if it doesn't exist.
+        Raises PreconditionFailed if expected_versions is given and the item's
+        updated_at is none of them, InsufficientQuantity if a decrement would
+        go below zero, ValueOutOfRange if a value doesn't fit its column, and
+        ConcurrentUpdate if racing writers kept it from settling.
+        """
+
+    @abstractmethod
+    def delete_item(self, item_id: int) -> bool:
+        """Delete an item, returning False if it doesn't exist"""
+
+    @abstractmethod
+    def get_aggregates(self) -> Dict[str, Any]:
+        """Inventory totals and quantity distribution"""
+
+    @abstractmethod
+    def verify_aggregates(self, repair: bool = False) -> Dict[str, Any]:
+        """Recompute aggregates from scratch and report drift"""
+
+class PostgresItemRepository(ItemRepository):
+    """Items stored in the PostgreSQL items table"""
+
+    name = "postgres"
+
+    @contextmanager
+    def _cursor(self):
+        """Borrow a pooled connection for one transaction; always releases cursor and connection"""
+        conn = get_db_connection()
+        discard = False
+        try:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # The connection itself is broken - don't hand it out again
+                discard = True
+                raise
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+        finally:
+            release_db_connection(conn, discard=discard)
+
+    def init_schema(self) -> Dict[str, Any]:
+        if not DATABASE_URL:
+            raise RuntimeError("Database connection not configured")
+        result = schema.migrate(DATABASE_URL)
+        if partitioning.ITEMS_PARTITIONING:
+            result["partitioning"] = partitioning.ensure(DATABASE_URL)
+        # Statements prepared before the schema changed may no longer match it
+        prepared.invalidate_all()
+        return result
+
+    def warm(self) -> Dict[str, Any]:
+        connections = warm_pool()
+        # Run the hot read paths once so catalog caches and table pages are loaded
+        self.list_items(0, 100)
+        self.get_aggregates()
+        return {"connections": connections}
+
+    def ping(self) -> None:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    def list_items(self, skip: int, limit: int) -> List[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            prepared.execute(cursor, ITEM_LIST, (limit, skip))
+            return cursor.fetchall()
+
+    def get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            prepared.execute(cursor, ITEM_GET, (item_id,))
+            return cursor.fetchone()
+
+    def get_items(self, item_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT * FROM items WHERE id = ANY(%s)", (item_ids,))
+            return {row["id"]: row for row in cursor.fetchall()}
+
+    def create_item(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self._cursor() as cursor:
+            prepared.execute(
+                cursor, ITEM_INSERT,
+                (fields["name"], fields["description"], fields["price"], fields["quantity"])
+            )
+            return cursor.fetchone()
+
+    def update_item(self, item_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._cursor() as cursor:
+            prepared.execute(
+                cursor, ITEM_UPDATE,
+                (fields["name"], fields["description"], fields["price"], fields["quantity"], item_id)
+            )
+            return cursor.fetchone()
+
+    def patch_item(self, item_id: int, fields: Dict[str, Any], quantity_delta: int = 0,
+                   expected_versions: Optional[List[datetime]] = None) -> Optional[Dict[str, Any]]:
+        has_quantity = "quantity" in fields
+        params = (
+            "name" in fields, fields.get("name"),
+            "description" in fields, fields.get("description"),
+            "price" in fields, fields.get("price"),
+            has_quantity, fields.get("quantity"), quantity_delta, quantity_delta,
+            item_id,
+            expected_versions, expected_versions,
+            quantity_delta, has_quantity, fields.get("quantity"), quantity_delta,
+        )
+        with self._cursor() as cursor:
+            for _ in range(PATCH_ATTEMPTS):
+                try:
+                    prepared.execute(cursor, ITEM_PATCH, params)
+                except psycopg2.errors.NumericValueOutOfRange as e:
+                    raise ValueOutOfRange(item_id, str(e).strip().splitlines()[0])
+                row = cursor.fetchone()
+                if row is not None:
+                    return row
+                # Nothing matched - find out which condition failed
+                prepared.execute(cursor, ITEM_GET, (item_id,))
+                current = cursor.fetchone()
+                if _check_patch(current, fields, quantity_delta, expected_versions) is None:
+                    return None
+                # A write between the two statements made the conditions pass
+                # (e.g. a restock after a refused decrement) - apply it now
+            raise ConcurrentUpdate(current)
+
+    def delete_item(self, item_id: int) -> bool:
+        with self._cursor() as cursor:
+            prepared.execute(cursor, ITEM_DELETE, (item_id,))
+            return cursor.fetchone() is not None
+
+    def get_aggregates(self) -> Dict[str, Any]:
+        with self._cursor() as cursor:
+            return aggregates.fetch_aggregates(cursor)
+
+    def verify_aggregates(self, repair: bool = False) -> Dict[str, Any]:
+        with self._cursor() as cursor:
+            return aggregates.verify(cursor, repair=repair)
+
+class InMemoryItemRepository(ItemRepository):
+    """
+    Items held in process memory, for benchmarks and running without PostgreSQL.
+
+    Rows live in an id-keyed dict and are never mutated once stored (updates
+    swap in a new dict), so single-item reads are lock-free. A list of
+    (created_at, id) kept sorted with bisect serves newest-first pagination;
+    writers and page reads take a short lock around it. Aggregates are kept
+    up to date on every write, mirroring the PostgreSQL triggers.
+    """
+
+    name = "memory"
+
+    def __init__(self, on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self._lock = threading.Lock()
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._index: List[tuple] = []  # (created_at, id), ascending
+        self._ids = itertools.count(1)
+        self._item_count = 0
+        self._total_quantity = 0
+        self._total_value = Decimal("0")
+        self._histogram = [0] * len(aggregates.QUANTITY_BUCKETS)
+        self.on_change = on_change
+
+    def ping(self) -> None:
+        return None
+
+    def list_items(self, skip: int, limit: int) -> List[Dict[str, Any]]:
+        items = self._items
+        with self._lock:
+            end = max(len(self._index) - max(skip, 0), 0)
+            start = max(end - max(limit, 0), 0)
+            keys = self._index[start:end]
+        # A row deleted after the slice was taken is simply skipped
+        rows = [items.get(item_id) for _, item_id in reversed(keys)]
+        return [row for row in rows if row is not None]
+
+    def get_item(self, item_id: int) -> Optional[Dict[str, Any]]:
+        return self._items.get(item_id)
+
+    def get_items(self, item_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        items = self._items
+        found = {}
+        for item_id in item_ids:
+            row = items.get(item_id)
+            if row is not None:
+                found[item_id] = row
+        return found
+
+    def create_item(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        with self._lock:
+            item_id = next(self._ids)
+            row = {
+                "id": item_id,
+                "name": fields["name"],
+                "description": fields["description"],
+                "price": fields["price"],
+                "quantity": fields["quantity"],
+                "created_at": now,
+                "updated_at": now,
+            }
+            self._items[item_id] = row
+            bisect.insort(self._index, (now, item_id))
+            self._apply_aggregates(row, 1)
+            self._notify("insert", row)
+        return row
+
+    def update_item(self, item_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            old = self._items.get(item_id)
+            if old is None:
+                return None
+            row = {
+                **old,
+                "name": fields["name"],
+                "description": fields["description"],
+                "price": fields["price"],
+                "quantity": fields["quantity"],
+                "updated_at": datetime.utcnow(),
+            }
+            self._items[item_id] = row
+            self._apply_aggregates(old, -1)
+            self._apply_aggregates(row, 1)
+            self._notify("update", row)
+        return row
+
+    def patch_item(self, item_id: int, fields: Dict[str, Any], quantity_delta: int = 0,
+                   expected_versions: Optional[List[datetime]] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            old = self._items.get(item_id)
+            if _check_patch(old, fields, quantity_delta, expected_versions) is None:
+                return None
+            row = {**old, **fields, "updated_at": datetime.utcnow()}
+            if quantity_delta:
+                row["quantity"] = (row["quantity"] or 0) + quantity_delta
+            self._items[item_id] = row
+            self._apply_aggregates(old, -1)
+            self._apply_aggregates(row, 1)
+            self._notify("update", row)
+        return row
+
+    def delete_item(self, item_id: int) -> bool:
+        with self._lock:
+            old = self._items.pop(item_id, None)
+            if old is None:
+                return False
+            key = (old["created_at"], item_id)
+            position = bisect.bisect_left(self._index, key)
+            if position < len(self._index) and self._index[position] == key:
+                del self._index[position]
+            self._apply_aggregates(old, -1)
+            self._notify("delete", old)
+        return True
+
+    def get_aggregates(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._summary()
+
+    def verify_aggregates(self, repair: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            summary = self._summary()
+            rows = list(self._items.values())
+            actual = aggregates.format_aggregates(
+                {
+                    "item_count": len(rows),
+                    "total_quantity": sum(row["quantity"] or 0 for row in rows),
+                    "total_value": sum((_line_value(row) for row in rows), Decimal("0")),
+                },
+                dict(enumerate(
+                    sum(1 for row in rows if aggregates.quantity_bucket(row["quantity"]) == bucket)
+                    for bucket in range(len(aggregates.QUANTITY_BUCKETS))
+                ))
+            )
+            differences = aggregates.compare(summary, actual)
+            repaired = False
+            if differences and repair:
+                self._item_count = actual["item_count"]
+                self._total_quantity = actual["total_quantity"]
+                self._total_value = actual["total_value"]
+                self._histogram = [actual["quantity_distribution"][label] for label in aggregates.QUANTITY_BUCKETS]
+                repaired = True
+        return {
+            "drift": bool(differences),
+            "differences": differences,
+            "repaired": repaired,
+            "summary": summary,
+            "actual": actual,
+        }
+
+    def _summary(self) -> Dict[str, Any]:
+        totals = {
+            "item_count": self._item_count,
+            "total_quantity": self._total_quantity,
+            "total_value": self._total_value,
+        }
+        return aggregates.format_aggregates(totals, dict(enumerate(self._histogram)))
+
+    def _apply_aggregates(self, row: Dict[str, Any], sign: int) -> None:
+        quantity = row["quantity"] or 0
+        self._item_count += sign
+        self._total_quantity += sign * quantity
+        self._total_value += sign * _line_value(row)
+        self._histogram[aggregates.quantity_bucket(row["quantity"])] += sign
+
+    def _notify(self, op: str, row: Dict[str, Any]) -> None:
+        # Called under the write lock so events are published in write order
+        if self.on_change is not None:
+            event = {"op": op, "id": row["id"]}
+            if op != "delete":
+                event["updated_at"] = row["updated_at"]
+            self.on_change(event)
+
+def _check_patch(current: Optional[Dict[str, Any]], fields: Dict[str, Any], quantity_delta: int,
+                 expected_versions: Optional[List[datetime]]) -> Optional[Dict[str, Any]]:
+    """Raise if a patch of the current row must be refused; returns the row (None if it doesn't exist)"""
+    if current is None:
+        return None
+    if expected_versions is not None and current["updated_at"] not in expected_versions:
+        raise PreconditionFailed(current)
+    quantity = fields["quantity"] if "quantity" in fields else current["quantity"]
+    if quantity_delta < 0 and (quantity or 0) + quantity_delta < 0:
+        raise InsufficientQuantity(current, quantity_delta)
+    if quantity_delta and not QUANTITY_MIN <= (quantity or 0) + quantity_delta <= QUANTITY_MAX:
+        raise ValueOutOfRange(current["id"], "integer out of range")
+    return current
+
+def _line_value(row: Dict[str, Any]) -> Decimal:
+    """price * quantity with the same DECIMAL(10, 2) rounding PostgreSQL applies to price"""
+    if row["price"] is None or not row["quantity"]:
+        return Decimal("0")
+    return Decimal(str(row["price"])).quantize(Decimal("0.01")) * row["quantity"]
+
+def create_repository(engine: str = STORAGE_ENGINE) -> ItemRepository:
+    """Build the storage backend selected by STORAGE_ENGINE"""
+    if engine == "postgres":
+        return PostgresItemRepository()
+    if engine == "memory":
+        return InMemoryItemRepository(on_change=changefeed.change_feed.publish)
+    raise ValueError(f"Unknown STORAGE_ENGINE '{engine}' (expected 'postgres' or 'memory')")